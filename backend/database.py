@@ -1,21 +1,34 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, select, text, func
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError, ProgrammingError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import logging
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./phone_extract.db")
 
+# Rows per multi-row INSERT statement for bulk inserts (insertmanyvalues)
+INSERT_PAGE_SIZE = int(os.getenv("INSERT_PAGE_SIZE", 10000))
+
+# Unfiltered Postgres counts above this size use the planner's row estimate
+COUNT_ESTIMATE_THRESHOLD = int(os.getenv("COUNT_ESTIMATE_THRESHOLD", 100000))
+
+engine_options = {"insertmanyvalues_page_size": INSERT_PAGE_SIZE}
+
 # Handle SQLite-specific configuration
 if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False}
-    )
-else:
-    engine = create_engine(DATABASE_URL)
+    engine_options["connect_args"] = {"check_same_thread": False}
+# Use psycopg2's fast paths for every executemany, not just INSERTs
+elif make_url(DATABASE_URL).get_dialect().driver == "psycopg2":
+    engine_options["executemany_mode"] = "values_plus_batch"
+
+engine = create_engine(DATABASE_URL, **engine_options)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -31,7 +44,74 @@ def get_db():
         db.close()
 
 
+def count_rows(db, query, model) -> int:
+    """
+    Count the rows matched by a paginated query.
+
+    Reuses the query's filters in a flat count so the database can answer
+    from an index. For unfiltered queries on large Postgres tables, return
+    the planner's estimate from pg_class instead of scanning the table.
+    """
+    if query.whereclause is None and db.get_bind().dialect.name == "postgresql":
+        estimate = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"),
+            {"table": model.__tablename__}
+        ).scalar()
+        if estimate is not None and estimate >= COUNT_ESTIMATE_THRESHOLD:
+            return estimate
+
+    # Plain SELECT count(id) ... WHERE, rather than Query.count()'s subquery wrap
+    return query.with_entities(func.count(model.id)).order_by(None).scalar()
+
+
+def find_duplicates(conn, index, limit: int = 10) -> list:
+    """Up to `limit` value tuples that occur more than once in a unique index's columns."""
+    columns = list(index.columns)
+    return conn.execute(
+        select(*columns).group_by(*columns).having(func.count() > 1).limit(limit)
+    ).all()
+
+
+def sync_indexes():
+    """
+    Bring the indexes of existing tables in line with the models.
+
+    create_all only creates indexes together with a new table, so tables
+    from older versions miss any index added since. Create those (checkfirst
+    skips ones already there), each in its own transaction so one
+    failure doesn't stop startup. A unique index is left
+    out while the table still holds duplicates, which are logged for cleanup.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                with engine.begin() as conn:
+                    if index.unique and not inspect(conn).has_index(table.name, index.name):
+                        duplicates = find_duplicates(conn, index)
+                        if duplicates:
+                            logger.warning(
+                                "Not creating unique index %s, duplicate values: %s",
+                                index.name, ", ".join(map(str, duplicates))
+                            )
+                            continue
+                    index.create(conn, checkfirst=True)
+            except Exception as e:
+                logger.warning("Could not create index %s: %s", index.name, e)
+
+
 def init_db():
     """Initialize database tables."""
     from models import Screenshot, ExtractedNumber, ExistingContact, Group, ComparisonResult
+
+    # Trigram indexes for the search endpoints need pg_trgm. Creating it
+    # takes privileges the app role may not have; searches still work
+    # without it, just without the trigram indexes
+    if engine.dialect.name == "postgresql":
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        except (ProgrammingError, OperationalError) as e:
+            logger.warning("pg_trgm is unavailable, skipping trigram indexes: %s", e)
+
     Base.metadata.create_all(bind=engine)
+    sync_indexes()
@@ -1,10 +1,13 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
 import os
 from dotenv import load_dotenv
 
 from database import init_db
+from services.ocr_service import shutdown_ocr_pool
 from routers import screenshots, extraction, numbers, groups, comparison, import_export
 
 load_dotenv()
@@ -15,6 +18,33 @@ app = FastAPI(
     version="1.0.0"
 )
 
+class ImportSizeLimitMiddleware:
+    """
+    Reject CSV imports whose declared body exceeds MAX_IMPORT_SIZE.
+
+    Runs before the multipart form is parsed, which spools the whole
+    upload to disk; open_csv_upload still checks the file itself. Plain
+    ASGI, so other requests, streamed exports included, pass straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith("/api/import/"):
+            length = Headers(scope=scope).get("content-length")
+            if length and length.isdigit() and int(length) > (
+                import_export.MAX_IMPORT_SIZE + import_export.IMPORT_FORM_OVERHEAD
+            ):
+                response = JSONResponse(status_code=413, content={"detail": "File too large"})
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+# Added before CORS so its 413 responses still get CORS headers
+app.add_middleware(ImportSizeLimitMiddleware)
+
 # CORS configuration
 origins = [
     "http://localhost:3000",
@@ -55,6 +85,12 @@ async def startup_event():
     init_db()
 
 
+@app.on_event("shutdown")
+def shutdown_event():
+    """Stop the batch OCR worker processes."""
+    shutdown_ocr_pool()
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Text, ForeignKey, Table, JSON, Float
+from sqlalchemy import Column, String, Boolean, DateTime, Text, ForeignKey, Table, JSON, Float, Index, text
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -20,7 +21,7 @@ class Screenshot(Base):
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     filename = Column(String(255), nullable=False)
     file_path = Column(String(500), nullable=False)
-    upload_date = Column(DateTime, default=datetime.utcnow)
+    upload_date = Column(DateTime, default=datetime.utcnow, index=True)
     ocr_text = Column(Text, nullable=True)
     processed = Column(Boolean, default=False)
     source = Column(String(100), nullable=True)  # "whatsapp", "sms", "call_log"
@@ -30,13 +31,44 @@ class Screenshot(Base):
     extracted_numbers = relationship("ExtractedNumber", back_populates="screenshot", cascade="all, delete-orphan")
 
 
+def has_pg_trgm(ddl, target, bind, **kw) -> bool:
+    """ddl_if check: skip trigram indexes when pg_trgm could not be installed."""
+    if not isinstance(bind, Connection):
+        # Emitting DDL without a database, e.g. a mock engine dump
+        return True
+    return bind.execute(
+        text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+    ).first() is not None
+
+
+def trigram_index(table: str, column: str) -> Index:
+    """GIN trigram index for substring (LIKE '%x%') search; Postgres with pg_trgm only."""
+    return Index(
+        f'ix_{table}_{column}_trgm',
+        column,
+        postgresql_using='gin',
+        postgresql_ops={column: 'gin_trgm_ops'}
+    ).ddl_if(dialect='postgresql', callable_=has_pg_trgm)
+
+
 class ExtractedNumber(Base):
     __tablename__ = 'extracted_numbers'
+    __table_args__ = (
+        trigram_index('extracted_numbers', 'raw_number'),
+        # Serves both '%<digits>%' and '+<digits>%' searches; the plain b-tree
+        # on the column is kept for the duplicate GROUP BY / IN lookups
+        trigram_index('extracted_numbers', 'normalized_number'),
+        # (extracted_at, id) is the pagination key; filtered listings get a composite each
+        Index('ix_extracted_numbers_extracted_id', 'extracted_at', 'id'),
+        Index('ix_extracted_numbers_screenshot_extracted', 'screenshot_id', 'extracted_at', 'id'),
+        Index('ix_extracted_numbers_country_extracted', 'country_code', 'extracted_at', 'id'),
+        Index('ix_extracted_numbers_valid_extracted', 'is_valid', 'extracted_at', 'id'),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     screenshot_id = Column(String, ForeignKey('screenshots.id', ondelete='CASCADE'))
     raw_number = Column(String(50))  # As found in screenshot
-    normalized_number = Column(String(20))  # E.164 format: +14155551234
+    normalized_number = Column(String(20), index=True)  # E.164 format: +14155551234
     country_code = Column(String(5))  # "+1", "+91"
     country_name = Column(String(100))  # "United States", "India"
     carrier = Column(String(100), nullable=True)
@@ -53,6 +85,12 @@ class ExtractedNumber(Base):
 class ExistingContact(Base):
     """Imported from Zoho CRM CSV"""
     __tablename__ = 'existing_contacts'
+    __table_args__ = (
+        trigram_index('existing_contacts', 'normalized_number'),
+        trigram_index('existing_contacts', 'name'),
+        trigram_index('existing_contacts', 'email'),
+        trigram_index('existing_contacts', 'company'),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     normalized_number = Column(String(20), unique=True, index=True)
@@ -62,7 +100,7 @@ class ExistingContact(Base):
     company = Column(String(255), nullable=True)
     source = Column(String(100), default="zoho_csv")
     zoho_id = Column(String(100), nullable=True)  # Original Zoho record ID
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     metadata_json = Column(JSON, nullable=True)  # Extra fields from CSV
 
     # Relationship
@@ -73,7 +111,7 @@ class Group(Base):
     __tablename__ = 'groups'
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    name = Column(String(100), nullable=False)
+    name = Column(String(100), nullable=False, unique=True, index=True)
     description = Column(Text, nullable=True)
     color = Column(String(7), default="#6366f1")  # Hex color
     is_system = Column(Boolean, default=False)  # True for auto-generated country groups
@@ -85,6 +123,9 @@ class Group(Base):
 
 class ComparisonResult(Base):
     __tablename__ = 'comparison_results'
+    __table_args__ = (
+        Index('ix_cmp_match_compared', 'match_type', 'compared_at'),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     extracted_number_id = Column(String, ForeignKey('extracted_numbers.id', ondelete='CASCADE'))
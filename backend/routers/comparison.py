@@ -1,79 +1,99 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import func, insert, delete, case, cast, select, Numeric
 from typing import Optional
 
-from database import get_db
+from database import get_db, INSERT_PAGE_SIZE
 from models import ExtractedNumber, ExistingContact, ComparisonResult
-from services.phone_parser import normalize_for_comparison
+from services.phone_parser import normalize_for_comparison, suffix_key
 
 router = APIRouter()
 
 
 @router.post("/run")
-async def run_comparison(
+def run_comparison(
     db: Session = Depends(get_db)
 ):
     """Run comparison of all extracted numbers against existing contacts."""
-    # Get all extracted numbers
-    extracted_numbers = db.query(ExtractedNumber).filter(
-        ExtractedNumber.normalized_number.isnot(None)
-    ).all()
+    # Map existing contact numbers to contact ids for fast lookup
+    existing_map = dict(
+        db.query(ExistingContact.normalized_number, ExistingContact.id).filter(
+            ExistingContact.normalized_number.isnot(None)
+        ).all()
+    )
 
-    # Get all existing contact numbers for fast lookup
-    existing_contacts = db.query(ExistingContact).all()
-    existing_map = {c.normalized_number: c for c in existing_contacts}
+    # Index contacts by their packed last 10 digits for partial matching
+    suffix_map = {}
+    for existing_norm, contact_id in existing_map.items():
+        key = suffix_key(existing_norm)
+        if key is not None:
+            suffix_map.setdefault(key, contact_id)
 
     # Clear previous comparison results
-    db.query(ComparisonResult).delete()
+    db.execute(delete(ComparisonResult))
 
     stats = {
-        'total': len(extracted_numbers),
+        'total': 0,
         'exact_matches': 0,
         'partial_matches': 0,
         'new': 0
     }
 
+    # Stream only the columns we need from extracted numbers
+    extracted_numbers = db.query(
+        ExtractedNumber.id,
+        ExtractedNumber.normalized_number
+    ).filter(
+        ExtractedNumber.normalized_number.isnot(None)
+    ).yield_per(5000)
+
+    # Results are collected as plain rows and inserted in batches
+    rows = []
+
     for number in extracted_numbers:
         norm = number.normalized_number
+        stats['total'] += 1
 
         if norm in existing_map:
             # Exact match
-            result = ComparisonResult(
-                extracted_number_id=number.id,
-                existing_contact_id=existing_map[norm].id,
-                match_type='exact',
-                confidence=1.0
-            )
+            rows.append({
+                'extracted_number_id': number.id,
+                'existing_contact_id': existing_map[norm],
+                'match_type': 'exact',
+                'confidence': 1.0
+            })
             stats['exact_matches'] += 1
         else:
             # Check for partial match (last 10 digits)
             partial_match = None
-            if norm and len(norm) >= 10:
-                last_digits = norm[-10:]
-                for existing_norm, contact in existing_map.items():
-                    if existing_norm and existing_norm.endswith(last_digits):
-                        partial_match = contact
-                        break
+            key = suffix_key(norm)
+            if key is not None:
+                partial_match = suffix_map.get(key)
 
             if partial_match:
-                result = ComparisonResult(
-                    extracted_number_id=number.id,
-                    existing_contact_id=partial_match.id,
-                    match_type='partial',
-                    confidence=0.8
-                )
+                rows.append({
+                    'extracted_number_id': number.id,
+                    'existing_contact_id': partial_match,
+                    'match_type': 'partial',
+                    'confidence': 0.8
+                })
                 stats['partial_matches'] += 1
             else:
-                result = ComparisonResult(
-                    extracted_number_id=number.id,
-                    existing_contact_id=None,
-                    match_type='none',
-                    confidence=0.0
-                )
+                rows.append({
+                    'extracted_number_id': number.id,
+                    'existing_contact_id': None,
+                    'match_type': 'none',
+                    'confidence': 0.0
+                })
                 stats['new'] += 1
 
-        db.add(result)
+        if len(rows) >= INSERT_PAGE_SIZE:
+            db.execute(insert(ComparisonResult), rows)
+            rows = []
+
+    # Multi-row INSERT; id and compared_at come from column defaults
+    if rows:
+        db.execute(insert(ComparisonResult), rows)
 
     db.commit()
 
@@ -84,7 +104,7 @@ async def run_comparison(
 
 
 @router.get("/results")
-async def get_comparison_results(
+def get_comparison_results(
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=200),
     match_type: Optional[str] = None,
@@ -97,7 +117,10 @@ async def get_comparison_results(
         query = query.filter(ComparisonResult.match_type == match_type)
 
     total = query.count()
-    results = query.order_by(ComparisonResult.compared_at.desc()) \
+    results = query.options(
+        joinedload(ComparisonResult.extracted_number),
+        joinedload(ComparisonResult.existing_contact)
+    ).order_by(ComparisonResult.compared_at.desc()) \
         .offset((page - 1) * limit) \
         .limit(limit) \
         .all()
@@ -136,32 +159,35 @@ async def get_comparison_results(
 
 
 @router.get("/new")
-async def get_new_numbers(
+def get_new_numbers(
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=200),
     db: Session = Depends(get_db)
 ):
     """Get numbers NOT found in existing database."""
-    query = db.query(ComparisonResult).filter(
+    query = db.query(ExtractedNumber).join(
+        ComparisonResult, ComparisonResult.extracted_number_id == ExtractedNumber.id
+    ).filter(
         ComparisonResult.match_type == 'none'
     )
 
     total = query.count()
-    results = query.offset((page - 1) * limit).limit(limit).all()
+    numbers = query.options(
+        selectinload(ExtractedNumber.groups)
+    ).offset((page - 1) * limit).limit(limit).all()
 
     items = []
-    for r in results:
-        if r.extracted_number:
-            items.append({
-                'id': r.extracted_number.id,
-                'raw_number': r.extracted_number.raw_number,
-                'normalized_number': r.extracted_number.normalized_number,
-                'country_code': r.extracted_number.country_code,
-                'country_name': r.extracted_number.country_name,
-                'carrier': r.extracted_number.carrier,
-                'is_valid': r.extracted_number.is_valid,
-                'groups': [{'id': g.id, 'name': g.name, 'color': g.color} for g in r.extracted_number.groups]
-            })
+    for n in numbers:
+        items.append({
+            'id': n.id,
+            'raw_number': n.raw_number,
+            'normalized_number': n.normalized_number,
+            'country_code': n.country_code,
+            'country_name': n.country_name,
+            'carrier': n.carrier,
+            'is_valid': n.is_valid,
+            'groups': [{'id': g.id, 'name': g.name, 'color': g.color} for g in n.groups]
+        })
 
     return {
         'items': items,
@@ -173,7 +199,7 @@ async def get_new_numbers(
 
 
 @router.get("/existing")
-async def get_existing_numbers(
+def get_existing_numbers(
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=200),
     db: Session = Depends(get_db)
@@ -184,7 +210,10 @@ async def get_existing_numbers(
     )
 
     total = query.count()
-    results = query.offset((page - 1) * limit).limit(limit).all()
+    results = query.options(
+        joinedload(ComparisonResult.extracted_number),
+        joinedload(ComparisonResult.existing_contact)
+    ).offset((page - 1) * limit).limit(limit).all()
 
     items = []
     for r in results:
@@ -218,24 +247,28 @@ async def get_existing_numbers(
 
 
 @router.get("/stats")
-async def get_comparison_stats(
+def get_comparison_stats(
     db: Session = Depends(get_db)
 ):
     """Get comparison statistics."""
-    total_extracted = db.query(ExtractedNumber).count()
-    total_existing = db.query(ExistingContact).count()
-
-    exact_matches = db.query(ComparisonResult).filter(
-        ComparisonResult.match_type == 'exact'
-    ).count()
-
-    partial_matches = db.query(ComparisonResult).filter(
-        ComparisonResult.match_type == 'partial'
-    ).count()
-
-    new_numbers = db.query(ComparisonResult).filter(
-        ComparisonResult.match_type == 'none'
-    ).count()
+    total_extracted_q = select(func.count(ExtractedNumber.id)).scalar_subquery()
+    total_existing_q = select(func.count(ExistingContact.id)).scalar_subquery()
+    matched = func.sum(case((ComparisonResult.match_type.in_(['exact', 'partial']), 1), else_=0))
+
+    # Count every match type and the match rate in a single round-trip.
+    # The ratio is cast to numeric: Postgres has no round(double precision, int)
+    (total_extracted, total_existing, exact_matches, partial_matches,
+     new_numbers, match_rate) = db.query(
+        total_extracted_q,
+        total_existing_q,
+        func.sum(case((ComparisonResult.match_type == 'exact', 1), else_=0)),
+        func.sum(case((ComparisonResult.match_type == 'partial', 1), else_=0)),
+        func.sum(case((ComparisonResult.match_type == 'none', 1), else_=0)),
+        func.round(cast(func.coalesce(matched, 0) * 100.0 / func.nullif(total_extracted_q, 0), Numeric), 2)
+    ).select_from(ComparisonResult).one()
+    exact_matches = exact_matches or 0
+    partial_matches = partial_matches or 0
+    new_numbers = new_numbers or 0
 
     not_compared = total_extracted - (exact_matches + partial_matches + new_numbers)
 
@@ -246,5 +279,5 @@ async def get_comparison_stats(
         'partial_matches': partial_matches,
         'new_numbers': new_numbers,
         'not_compared': not_compared,
-        'match_rate': round((exact_matches + partial_matches) / total_extracted * 100, 2) if total_extracted > 0 else 0
+        'match_rate': float(match_rate) if match_rate is not None else 0
     }
@@ -1,18 +1,94 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import insert, delete
+from typing import List, Optional
+import uuid
 
 from database import get_db
 from models import Screenshot, ExtractedNumber
 from schemas import ExtractionResult, ExtractedNumberSummary
-from services.ocr_service import extract_text_from_image, detect_source
+from services.ocr_service import extract_text_from_image, extract_text_from_images, detect_source
 from services.phone_parser import extract_phones_from_text
+from services import stats_cache
 
 router = APIRouter()
 
+def _load_batch_jobs(db: Session, screenshot_ids: Optional[List[str]], extract_all_unprocessed: bool):
+    """Resolve the screenshots to process, returning (jobs, errors)."""
+    errors = []
+
+    if extract_all_unprocessed:
+        return db.query(Screenshot).filter(Screenshot.processed == False).all(), errors
+
+    jobs = []
+    for sid in screenshot_ids:
+        screenshot = db.query(Screenshot).filter(Screenshot.id == sid).first()
+        if not screenshot:
+            errors.append({"id": sid, "error": "Not found"})
+            continue
+        jobs.append(screenshot)
+    return jobs, errors
+
+
+def _save_batch_results(db: Session, jobs: List[Screenshot], ocr_results: list, errors: list):
+    """Parse OCR output and replace each screenshot's numbers in one transaction."""
+    results = []
+    ids_to_clear = []
+    new_rows = []
+
+    for screenshot, outcome in zip(jobs, ocr_results):
+        sid = screenshot.id
+        try:
+            if isinstance(outcome, Exception):
+                raise outcome
+
+            source, ocr_text = outcome
+
+            # Extract phone numbers
+            phones = extract_phones_from_text(ocr_text, source)
+
+            # Queue replacement of existing numbers
+            ids_to_clear.append(sid)
+            for phone in phones:
+                new_rows.append({
+                    'screenshot_id': sid,
+                    'raw_number': phone['raw'],
+                    'normalized_number': phone.get('normalized'),
+                    'country_code': phone.get('country_code'),
+                    'country_name': phone.get('country_name'),
+                    'carrier': phone.get('carrier'),
+                    'number_type': phone.get('number_type'),
+                    'is_valid': phone.get('is_valid', False)
+                })
+
+            screenshot.ocr_text = ocr_text
+            screenshot.processed = True
+            screenshot.source = source
+
+            results.append({
+                "id": sid,
+                "numbers_found": len(phones)
+            })
+
+        except Exception as e:
+            errors.append({"id": sid, "error": str(e)})
+
+    # Delete existing and save new numbers in bulk
+    if ids_to_clear:
+        db.execute(
+            delete(ExtractedNumber).where(ExtractedNumber.screenshot_id.in_(ids_to_clear))
+        )
+    if new_rows:
+        db.execute(insert(ExtractedNumber), new_rows)
+
+    db.commit()
+    stats_cache.invalidate()
+    return results
+
 
 @router.post("/{screenshot_id}", response_model=ExtractionResult)
-async def extract_from_screenshot(
+def extract_from_screenshot(
     screenshot_id: str,
     source: str = Query(None, description="Override source detection"),
     db: Session = Depends(get_db)
@@ -39,21 +115,23 @@ async def extract_from_screenshot(
             ExtractedNumber.screenshot_id == screenshot_id
         ).delete()
 
-        # Save extracted numbers
-        extracted_numbers = []
-        for phone in phones:
-            number = ExtractedNumber(
-                screenshot_id=screenshot_id,
-                raw_number=phone['raw'],
-                normalized_number=phone.get('normalized'),
-                country_code=phone.get('country_code'),
-                country_name=phone.get('country_name'),
-                carrier=phone.get('carrier'),
-                number_type=phone.get('number_type'),
-                is_valid=phone.get('is_valid', False)
-            )
-            db.add(number)
-            extracted_numbers.append(number)
+        # Save extracted numbers; ids are generated here so no re-read is needed
+        extracted_numbers = [
+            {
+                'id': str(uuid.uuid4()),
+                'screenshot_id': screenshot_id,
+                'raw_number': phone['raw'],
+                'normalized_number': phone.get('normalized'),
+                'country_code': phone.get('country_code'),
+                'country_name': phone.get('country_name'),
+                'carrier': phone.get('carrier'),
+                'number_type': phone.get('number_type'),
+                'is_valid': phone.get('is_valid', False)
+            }
+            for phone in phones
+        ]
+        if extracted_numbers:
+            db.execute(insert(ExtractedNumber), extracted_numbers)
 
         # Update screenshot
         screenshot.ocr_text = ocr_text
@@ -61,10 +139,7 @@ async def extract_from_screenshot(
         screenshot.source = source
 
         db.commit()
-
-        # Refresh to get IDs
-        for num in extracted_numbers:
-            db.refresh(num)
+        stats_cache.invalidate()
 
         return ExtractionResult(
             screenshot_id=screenshot_id,
@@ -72,12 +147,12 @@ async def extract_from_screenshot(
             numbers_found=len(extracted_numbers),
             numbers=[
                 ExtractedNumberSummary(
-                    id=n.id,
-                    raw_number=n.raw_number,
-                    normalized_number=n.normalized_number,
-                    country_code=n.country_code,
-                    country_name=n.country_name,
-                    is_valid=n.is_valid
+                    id=n['id'],
+                    raw_number=n['raw_number'],
+                    normalized_number=n['normalized_number'],
+                    country_code=n['country_code'],
+                    country_name=n['country_name'],
+                    is_valid=n['is_valid']
                 )
                 for n in extracted_numbers
             ]
@@ -94,65 +169,25 @@ async def batch_extract(
     db: Session = Depends(get_db)
 ):
     """Batch extract phone numbers from multiple screenshots."""
-    results = []
-    errors = []
-
-    if extract_all_unprocessed:
-        screenshots = db.query(Screenshot).filter(Screenshot.processed == False).all()
-        screenshot_ids = [s.id for s in screenshots]
-    elif not screenshot_ids:
+    if not extract_all_unprocessed and not screenshot_ids:
         raise HTTPException(
             status_code=400,
             detail="Provide screenshot_ids or set extract_all_unprocessed=true"
         )
 
-    for sid in screenshot_ids:
-        try:
-            screenshot = db.query(Screenshot).filter(Screenshot.id == sid).first()
-            if not screenshot:
-                errors.append({"id": sid, "error": "Not found"})
-                continue
-
-            source = screenshot.source or detect_source(screenshot.file_path)
-
-            # Run OCR
-            ocr_text = extract_text_from_image(screenshot.file_path, source)
-
-            # Extract phone numbers
-            phones = extract_phones_from_text(ocr_text, source)
-
-            # Delete existing
-            db.query(ExtractedNumber).filter(
-                ExtractedNumber.screenshot_id == sid
-            ).delete()
+    # Database work runs in the threadpool so the event loop stays free
+    jobs, errors = await run_in_threadpool(
+        _load_batch_jobs, db, screenshot_ids, extract_all_unprocessed
+    )
 
-            # Save new
-            for phone in phones:
-                number = ExtractedNumber(
-                    screenshot_id=sid,
-                    raw_number=phone['raw'],
-                    normalized_number=phone.get('normalized'),
-                    country_code=phone.get('country_code'),
-                    country_name=phone.get('country_name'),
-                    carrier=phone.get('carrier'),
-                    number_type=phone.get('number_type'),
-                    is_valid=phone.get('is_valid', False)
-                )
-                db.add(number)
-
-            screenshot.ocr_text = ocr_text
-            screenshot.processed = True
-            screenshot.source = source
+    # Run OCR for all screenshots across worker processes, off the event loop
+    ocr_results = await run_in_threadpool(
+        extract_text_from_images,
+        [s.file_path for s in jobs],
+        [s.source for s in jobs]
+    )
 
-            results.append({
-                "id": sid,
-                "numbers_found": len(phones)
-            })
-
-        except Exception as e:
-            errors.append({"id": sid, "error": str(e)})
-
-    db.commit()
+    results = await run_in_threadpool(_save_batch_results, db, jobs, ocr_results, errors)
 
     return {
         "processed": len(results),
@@ -163,7 +198,7 @@ async def batch_extract(
 
 
 @router.get("/status/{screenshot_id}")
-async def get_extraction_status(
+def get_extraction_status(
     screenshot_id: str,
     db: Session = Depends(get_db)
 ):
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import func, select, literal, delete
 from typing import List
 
 from database import get_db
@@ -8,18 +10,24 @@ from schemas import GroupCreate, GroupUpdate, GroupResponse, GroupDetailResponse
 
 router = APIRouter()
 
+# Colors for auto-generated country groups
+COUNTRY_COLORS = {
+    '+1': '#3B82F6',   # US/CA - Blue
+    '+91': '#F97316',  # India - Orange
+    '+44': '#EF4444',  # UK - Red
+    '+61': '#10B981',  # Australia - Green
+    '+971': '#8B5CF6', # UAE - Purple
+    '+92': '#14B8A6',  # Pakistan - Teal
+    '+880': '#F59E0B', # Bangladesh - Amber
+}
+
 
 @router.post("", response_model=GroupResponse)
-async def create_group(
+def create_group(
     group: GroupCreate,
     db: Session = Depends(get_db)
 ):
     """Create a new custom group."""
-    # Check for duplicate name
-    existing = db.query(Group).filter(Group.name == group.name).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Group name already exists")
-
     new_group = Group(
         name=group.name,
         description=group.description,
@@ -27,7 +35,12 @@ async def create_group(
         is_system=False
     )
     db.add(new_group)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Unique index on Group.name
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Group name already exists")
     db.refresh(new_group)
 
     return GroupResponse(
@@ -42,7 +55,7 @@ async def create_group(
 
 
 @router.get("", response_model=List[GroupResponse])
-async def list_groups(
+def list_groups(
     include_system: bool = Query(True, description="Include system-generated country groups"),
     db: Session = Depends(get_db)
 ):
@@ -54,9 +67,16 @@ async def list_groups(
 
     groups = query.order_by(Group.created_at.desc()).all()
 
+    # Count members for all groups in one aggregate query
+    counts = dict(
+        db.query(number_groups.c.group_id, func.count())
+        .group_by(number_groups.c.group_id)
+        .all()
+    )
+
     result = []
     for g in groups:
-        count = len(g.numbers)
+        count = counts.get(g.id, 0)
         result.append(GroupResponse(
             id=g.id,
             name=g.name,
@@ -71,7 +91,7 @@ async def list_groups(
 
 
 @router.get("/{group_id}", response_model=dict)
-async def get_group(
+def get_group(
     group_id: str,
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=200),
@@ -83,11 +103,16 @@ async def get_group(
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
 
-    # Paginate numbers
-    total = len(group.numbers)
-    start = (page - 1) * limit
-    end = start + limit
-    numbers = group.numbers[start:end]
+    # Paginate numbers in SQL rather than loading the whole collection
+    numbers_query = db.query(ExtractedNumber).join(
+        number_groups, number_groups.c.extracted_number_id == ExtractedNumber.id
+    ).filter(number_groups.c.group_id == group_id)
+
+    total = numbers_query.with_entities(func.count()).scalar()
+    numbers = numbers_query.order_by(ExtractedNumber.extracted_at.desc()) \
+        .offset((page - 1) * limit) \
+        .limit(limit) \
+        .all()
 
     return {
         "id": group.id,
@@ -115,7 +140,7 @@ async def get_group(
 
 
 @router.put("/{group_id}", response_model=GroupResponse)
-async def update_group(
+def update_group(
     group_id: str,
     update: GroupUpdate,
     db: Session = Depends(get_db)
@@ -130,13 +155,6 @@ async def update_group(
         raise HTTPException(status_code=400, detail="Cannot modify system groups")
 
     if update.name is not None:
-        # Check for duplicate
-        existing = db.query(Group).filter(
-            Group.name == update.name,
-            Group.id != group_id
-        ).first()
-        if existing:
-            raise HTTPException(status_code=400, detail="Group name already exists")
         group.name = update.name
 
     if update.description is not None:
@@ -145,7 +163,12 @@ async def update_group(
     if update.color is not None:
         group.color = update.color
 
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Unique index on Group.name
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Group name already exists")
     db.refresh(group)
 
     return GroupResponse(
@@ -160,7 +183,7 @@ async def update_group(
 
 
 @router.delete("/{group_id}")
-async def delete_group(
+def delete_group(
     group_id: str,
     db: Session = Depends(get_db)
 ):
@@ -180,7 +203,7 @@ async def delete_group(
 
 
 @router.post("/{group_id}/numbers")
-async def add_numbers_to_group(
+def add_numbers_to_group(
     group_id: str,
     data: AddNumbersToGroup,
     db: Session = Depends(get_db)
@@ -191,20 +214,31 @@ async def add_numbers_to_group(
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
 
-    added = 0
-    for number_id in data.number_ids:
-        number = db.query(ExtractedNumber).filter(ExtractedNumber.id == number_id).first()
-        if number and number not in group.numbers:
-            group.numbers.append(number)
-            added += 1
+    # Look up the requested numbers and current memberships in bulk
+    numbers = db.query(ExtractedNumber.id).filter(
+        ExtractedNumber.id.in_(data.number_ids)
+    ).all()
+    existing_ids = {
+        row[0] for row in db.query(number_groups.c.extracted_number_id).filter(
+            number_groups.c.group_id == group_id,
+            number_groups.c.extracted_number_id.in_(data.number_ids)
+        ).all()
+    }
+
+    new_links = [
+        {"group_id": group_id, "extracted_number_id": n.id}
+        for n in numbers if n.id not in existing_ids
+    ]
+    if new_links:
+        db.execute(number_groups.insert(), new_links)
 
     db.commit()
 
-    return {"added": added, "total_in_group": len(group.numbers)}
+    return {"added": len(new_links), "total_in_group": count_group_numbers(db, group_id)}
 
 
 @router.delete("/{group_id}/numbers")
-async def remove_numbers_from_group(
+def remove_numbers_from_group(
     group_id: str,
     number_ids: List[str],
     db: Session = Depends(get_db)
@@ -215,20 +249,21 @@ async def remove_numbers_from_group(
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
 
-    removed = 0
-    for number_id in number_ids:
-        number = db.query(ExtractedNumber).filter(ExtractedNumber.id == number_id).first()
-        if number and number in group.numbers:
-            group.numbers.remove(number)
-            removed += 1
+    # Drop the association rows directly
+    removed = db.execute(
+        delete(number_groups).where(
+            number_groups.c.group_id == group_id,
+            number_groups.c.extracted_number_id.in_(number_ids)
+        )
+    ).rowcount
 
     db.commit()
 
-    return {"removed": removed, "total_in_group": len(group.numbers)}
+    return {"removed": removed, "total_in_group": count_group_numbers(db, group_id)}
 
 
 @router.post("/auto-create-country-groups")
-async def create_country_groups(
+def create_country_groups(
     db: Session = Depends(get_db)
 ):
     """Auto-create system groups for each country in extracted numbers."""
@@ -262,12 +297,13 @@ async def create_country_groups(
         db.add(group)
         db.flush()
 
-        # Add numbers to group
-        numbers = db.query(ExtractedNumber).filter(
-            ExtractedNumber.country_code == cc
-        ).all()
-        for num in numbers:
-            group.numbers.append(num)
+        # Add numbers to group server-side with INSERT ... SELECT
+        db.execute(number_groups.insert().from_select(
+            ['group_id', 'extracted_number_id'],
+            select(literal(group.id), ExtractedNumber.id).where(
+                ExtractedNumber.country_code == cc
+            )
+        ))
 
         created += 1
 
@@ -276,15 +312,13 @@ async def create_country_groups(
     return {"created": created}
 
 
+def count_group_numbers(db: Session, group_id: str) -> int:
+    """Return the number of extracted numbers in a group."""
+    return db.query(func.count()).select_from(number_groups).filter(
+        number_groups.c.group_id == group_id
+    ).scalar()
+
+
 def get_country_color(country_code: str) -> str:
     """Return a color for a country code."""
-    colors = {
-        '+1': '#3B82F6',   # US/CA - Blue
-        '+91': '#F97316',  # India - Orange
-        '+44': '#EF4444',  # UK - Red
-        '+61': '#10B981',  # Australia - Green
-        '+971': '#8B5CF6', # UAE - Purple
-        '+92': '#14B8A6',  # Pakistan - Teal
-        '+880': '#F59E0B', # Bangladesh - Amber
-    }
-    return colors.get(country_code, '#6366F1')  # Default indigo
+    return COUNTRY_COLORS.get(country_code, '#6366F1')  # Default indigo
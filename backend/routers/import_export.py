@@ -1,25 +1,89 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import delete, func, text
 from typing import Optional
 import os
-import uuid
-import aiofiles
 import io
 import csv
 
-from database import get_db
+from database import get_db, count_rows
 from models import ExistingContact, ExtractedNumber, ComparisonResult
 from schemas import CSVColumnMapping, ImportResult, CSVPreviewResponse, ExistingContactResponse
 from services.csv_importer import preview_csv, import_contacts_from_csv
 
 router = APIRouter()
 
-UPLOAD_DIR = os.getenv("UPLOAD_DIR", "./uploads")
+MAX_IMPORT_SIZE = int(os.getenv("MAX_IMPORT_SIZE", 104857600))  # 100MB default
+IMPORT_FORM_OVERHEAD = 65536  # Allowance for multipart boundaries and part headers
+EXPORT_BATCH_SIZE = 1000  # Rows fetched per round-trip in CSV exports
+EXPORT_CHUNK_BYTES = 65536  # Buffered CSV text flushed to the response per chunk
+
+
+def encode_csv_row(row: list) -> bytes:
+    """Render a single CSV row, used to build the export headers once at import time."""
+    output = io.StringIO()
+    csv.writer(output).writerow(row)
+    return output.getvalue().encode('utf-8')
+
+
+NUMBERS_EXPORT_HEADER = encode_csv_row([
+    'Raw Number', 'Normalized Number', 'Country Code', 'Country Name',
+    'Carrier', 'Number Type', 'Is Valid', 'Extracted At'
+])
+COMPARISON_EXPORT_HEADER = encode_csv_row([
+    'Extracted Number', 'Normalized', 'Country', 'Match Type', 'Confidence',
+    'Existing Contact Name', 'Existing Contact Email', 'Existing Contact Company'
+])
+NEW_NUMBERS_EXPORT_HEADER = encode_csv_row([
+    'Raw Number', 'Normalized Number', 'Country Code', 'Country Name',
+    'Carrier', 'Number Type'
+])
+
+
+def open_csv_upload(file: UploadFile):
+    """
+    Return the uploaded CSV as a file object, rejecting files over MAX_IMPORT_SIZE.
+
+    Starlette already holds uploads in a SpooledTemporaryFile, so small CSVs
+    are parsed straight from memory without another copy to disk.
+    """
+    size = file.size
+    if size is None:
+        size = file.file.seek(0, os.SEEK_END)
+    if size > MAX_IMPORT_SIZE:
+        raise HTTPException(status_code=413, detail="File too large")
+
+    file.file.seek(0)
+    return file.file
+
+
+def stream_csv(db: Session, header: bytes, rows):
+    """
+    Yield a CSV export in encoded chunks of roughly EXPORT_CHUNK_BYTES.
+
+    Closes the session once the stream is exhausted, since the response
+    body is consumed after the endpoint has returned.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+
+    try:
+        yield header
+        for row in rows:
+            writer.writerow(row)
+            if output.tell() > EXPORT_CHUNK_BYTES:
+                yield output.getvalue().encode('utf-8')
+                output.seek(0)
+                output.truncate(0)
+        if output.tell():
+            yield output.getvalue().encode('utf-8')
+    finally:
+        db.close()
 
 
 @router.post("/import/zoho-csv", response_model=ImportResult)
-async def import_zoho_csv(
+def import_zoho_csv(
     file: UploadFile = File(...),
     phone_column: str = Query(..., description="Column name for phone numbers"),
     name_column: Optional[str] = None,
@@ -32,13 +96,8 @@ async def import_zoho_csv(
     if not file.filename or not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be a CSV")
 
-    # Save uploaded file temporarily
-    temp_path = os.path.join(UPLOAD_DIR, f"temp_{uuid.uuid4()}.csv")
-
     try:
-        async with aiofiles.open(temp_path, 'wb') as out_file:
-            content = await file.read()
-            await out_file.write(content)
+        csv_file = open_csv_upload(file)
 
         # Build column mapping
         mapping = {
@@ -50,36 +109,29 @@ async def import_zoho_csv(
         }
 
         # Import contacts
-        result = import_contacts_from_csv(temp_path, mapping, db)
+        result = import_contacts_from_csv(csv_file, mapping, db)
 
         return ImportResult(**result)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        # Clean up temp file
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
 
 
 @router.post("/import/mapping-preview", response_model=CSVPreviewResponse)
-async def preview_csv_mapping(
+def preview_csv_mapping(
     file: UploadFile = File(...),
 ):
     """Preview CSV columns and suggest mappings."""
     if not file.filename or not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be a CSV")
 
-    # Save uploaded file temporarily
-    temp_path = os.path.join(UPLOAD_DIR, f"temp_{uuid.uuid4()}.csv")
-
     try:
-        async with aiofiles.open(temp_path, 'wb') as out_file:
-            content = await file.read()
-            await out_file.write(content)
+        csv_file = open_csv_upload(file)
 
         # Preview CSV
-        result = preview_csv(temp_path)
+        result = preview_csv(csv_file)
 
         return CSVPreviewResponse(
             columns=result['columns'],
@@ -89,22 +141,33 @@ async def preview_csv_mapping(
             })
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
 
 
 @router.get("/existing-contacts", response_model=dict)
-async def list_existing_contacts(
+def list_existing_contacts(
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=200),
     search: Optional[str] = None,
+    include_total: bool = Query(True, description="Include total count; disable for faster paging"),
     db: Session = Depends(get_db)
 ):
     """List imported existing contacts."""
-    query = db.query(ExistingContact)
+    # Select only the columns in the response (skips metadata_json)
+    query = db.query(
+        ExistingContact.id,
+        ExistingContact.normalized_number,
+        ExistingContact.raw_number,
+        ExistingContact.name,
+        ExistingContact.email,
+        ExistingContact.company,
+        ExistingContact.source,
+        ExistingContact.zoho_id,
+        ExistingContact.created_at
+    )
 
     if search:
         search_pattern = f"%{search}%"
@@ -115,12 +178,16 @@ async def list_existing_contacts(
             (ExistingContact.company.like(search_pattern))
         )
 
-    total = query.count()
+    total = count_rows(db, query, ExistingContact) if include_total else None
     contacts = query.order_by(ExistingContact.created_at.desc()) \
         .offset((page - 1) * limit) \
-        .limit(limit) \
+        .limit(limit + 1) \
         .all()
 
+    # The extra row only tells us whether another page exists
+    has_next = len(contacts) > limit
+    contacts = contacts[:limit]
+
     return {
         'items': [
             {
@@ -139,26 +206,33 @@ async def list_existing_contacts(
         'total': total,
         'page': page,
         'limit': limit,
-        'pages': (total + limit - 1) // limit
+        'pages': (total + limit - 1) // limit if total is not None else None,
+        'has_next': has_next
     }
 
 
 @router.delete("/existing-contacts")
-async def clear_existing_contacts(
+def clear_existing_contacts(
     db: Session = Depends(get_db)
 ):
     """Clear all existing contacts."""
-    # First clear comparison results
-    db.query(ComparisonResult).delete()
-    # Then clear contacts
-    count = db.query(ExistingContact).delete()
+    if db.get_bind().dialect.name == "postgresql":
+        # TRUNCATE skips per-row MVCC and WAL work; it reports no rowcount,
+        # so count exactly first (count_rows may return the planner estimate)
+        count = db.query(func.count(ExistingContact.id)).scalar()
+        db.execute(text("TRUNCATE comparison_results, existing_contacts"))
+    else:
+        # First clear comparison results, then contacts, without ORM session sync
+        no_sync = {"synchronize_session": False}
+        db.execute(delete(ComparisonResult), execution_options=no_sync)
+        count = db.execute(delete(ExistingContact), execution_options=no_sync).rowcount
     db.commit()
 
     return {'deleted': count}
 
 
 @router.get("/export/numbers")
-async def export_numbers(
+def export_numbers(
     format: str = Query("csv", description="Export format (csv)"),
     country_code: Optional[str] = None,
     is_valid: Optional[bool] = None,
@@ -172,21 +246,8 @@ async def export_numbers(
     if is_valid is not None:
         query = query.filter(ExtractedNumber.is_valid == is_valid)
 
-    numbers = query.all()
-
-    # Create CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    # Header
-    writer.writerow([
-        'Raw Number', 'Normalized Number', 'Country Code', 'Country Name',
-        'Carrier', 'Number Type', 'Is Valid', 'Extracted At'
-    ])
-
-    # Data
-    for n in numbers:
-        writer.writerow([
+    rows = (
+        (
             n.raw_number,
             n.normalized_number or '',
             n.country_code or '',
@@ -195,19 +256,19 @@ async def export_numbers(
             n.number_type or '',
             'Yes' if n.is_valid else 'No',
             n.extracted_at.isoformat()
-        ])
-
-    output.seek(0)
+        )
+        for n in query.yield_per(EXPORT_BATCH_SIZE)
+    )
 
     return StreamingResponse(
-        io.BytesIO(output.getvalue().encode('utf-8')),
+        stream_csv(db, NUMBERS_EXPORT_HEADER, rows),
         media_type='text/csv',
         headers={'Content-Disposition': 'attachment; filename=extracted_numbers.csv'}
     )
 
 
 @router.get("/export/comparison")
-async def export_comparison(
+def export_comparison(
     match_type: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
@@ -217,21 +278,13 @@ async def export_comparison(
     if match_type:
         query = query.filter(ComparisonResult.match_type == match_type)
 
-    results = query.all()
-
-    # Create CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    # Header
-    writer.writerow([
-        'Extracted Number', 'Normalized', 'Country', 'Match Type', 'Confidence',
-        'Existing Contact Name', 'Existing Contact Email', 'Existing Contact Company'
-    ])
+    query = query.options(
+        joinedload(ComparisonResult.extracted_number),
+        joinedload(ComparisonResult.existing_contact)
+    )
 
-    # Data
-    for r in results:
-        writer.writerow([
+    rows = (
+        (
             r.extracted_number.raw_number if r.extracted_number else '',
             r.extracted_number.normalized_number if r.extracted_number else '',
             r.extracted_number.country_name if r.extracted_number else '',
@@ -240,53 +293,43 @@ async def export_comparison(
             r.existing_contact.name if r.existing_contact else '',
             r.existing_contact.email if r.existing_contact else '',
             r.existing_contact.company if r.existing_contact else ''
-        ])
-
-    output.seek(0)
+        )
+        for r in query.yield_per(EXPORT_BATCH_SIZE)
+    )
 
     return StreamingResponse(
-        io.BytesIO(output.getvalue().encode('utf-8')),
+        stream_csv(db, COMPARISON_EXPORT_HEADER, rows),
         media_type='text/csv',
         headers={'Content-Disposition': 'attachment; filename=comparison_results.csv'}
     )
 
 
 @router.get("/export/new-numbers")
-async def export_new_numbers(
+def export_new_numbers(
     db: Session = Depends(get_db)
 ):
     """Export only new numbers (not in existing database) as CSV."""
-    results = db.query(ComparisonResult).filter(
+    query = db.query(ComparisonResult).options(
+        joinedload(ComparisonResult.extracted_number)
+    ).filter(
         ComparisonResult.match_type == 'none'
-    ).all()
-
-    # Create CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
+    )
 
-    # Header
-    writer.writerow([
-        'Raw Number', 'Normalized Number', 'Country Code', 'Country Name',
-        'Carrier', 'Number Type'
-    ])
-
-    # Data
-    for r in results:
-        if r.extracted_number:
-            n = r.extracted_number
-            writer.writerow([
-                n.raw_number,
-                n.normalized_number or '',
-                n.country_code or '',
-                n.country_name or '',
-                n.carrier or '',
-                n.number_type or ''
-            ])
-
-    output.seek(0)
+    rows = (
+        (
+            n.raw_number,
+            n.normalized_number or '',
+            n.country_code or '',
+            n.country_name or '',
+            n.carrier or '',
+            n.number_type or ''
+        )
+        for n in (r.extracted_number for r in query.yield_per(EXPORT_BATCH_SIZE))
+        if n
+    )
 
     return StreamingResponse(
-        io.BytesIO(output.getvalue().encode('utf-8')),
+        stream_csv(db, NEW_NUMBERS_EXPORT_HEADER, rows),
         media_type='text/csv',
         headers={'Content-Disposition': 'attachment; filename=new_numbers.csv'}
     )
@@ -1,27 +1,61 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, case, tuple_
 from typing import Optional, List
+from collections import defaultdict
+from datetime import datetime
+import base64
+import re
 
-from database import get_db
-from models import ExtractedNumber, ComparisonResult
+from database import get_db, count_rows
+from models import ExtractedNumber, ComparisonResult, Group, number_groups
 from schemas import ExtractedNumberResponse, NumbersByCountry, NumbersStats
+from services import stats_cache
 
 router = APIRouter()
 
 
+def encode_cursor(extracted_at: datetime, number_id: str) -> str:
+    """Encode the (extracted_at, id) keyset position of a row as an opaque cursor."""
+    raw = f"{extracted_at.isoformat()}|{number_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    """Decode a cursor from encode_cursor back into (extracted_at, id)."""
+    try:
+        ts, number_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(ts), number_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("", response_model=dict)
-async def list_numbers(
+def list_numbers(
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=200),
     country_code: Optional[str] = None,
     is_valid: Optional[bool] = None,
     screenshot_id: Optional[str] = None,
     search: Optional[str] = None,
+    include_total: bool = Query(True, description="Include total count; disable for faster paging"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces page"),
     db: Session = Depends(get_db)
 ):
     """List all extracted numbers with filters and pagination."""
-    query = db.query(ExtractedNumber)
+    # Select only the columns in the response, skipping ORM instances
+    query = db.query(
+        ExtractedNumber.id,
+        ExtractedNumber.screenshot_id,
+        ExtractedNumber.raw_number,
+        ExtractedNumber.normalized_number,
+        ExtractedNumber.country_code,
+        ExtractedNumber.country_name,
+        ExtractedNumber.carrier,
+        ExtractedNumber.number_type,
+        ExtractedNumber.is_valid,
+        ExtractedNumber.extracted_at
+    )
 
     if country_code:
         query = query.filter(ExtractedNumber.country_code == country_code)
@@ -30,28 +64,72 @@ async def list_numbers(
     if screenshot_id:
         query = query.filter(ExtractedNumber.screenshot_id == screenshot_id)
     if search:
-        search_pattern = f"%{search}%"
+        # Only indexed on Postgres with pg_trgm: the raw_number and local
+        # fragment matches below have a leading wildcard, so without the
+        # trigram indexes (SQLite, or no extension) every search scans
+        digits = re.sub(r'\D', '', search)
+        if digits and search.lstrip().startswith('+'):
+            # A country code was typed: prefix match on the E.164 number, plus
+            # the raw text for invalid numbers that have no normalized form
+            query = query.filter(
+                (ExtractedNumber.normalized_number.like(f"+{digits}%")) |
+                (ExtractedNumber.raw_number.like(f"%{search}%"))
+            )
+        elif digits:
+            # Local fragments like '415' match anywhere
+            query = query.filter(
+                (ExtractedNumber.normalized_number.like(f"%{digits}%")) |
+                (ExtractedNumber.raw_number.like(f"%{search}%"))
+            )
+        else:
+            query = query.filter(ExtractedNumber.raw_number.like(f"%{search}%"))
+
+    total = count_rows(db, query, ExtractedNumber) if include_total else None
+
+    query = query.order_by(ExtractedNumber.extracted_at.desc(), ExtractedNumber.id.desc())
+    if cursor:
+        # Keyset pagination: seek past the last row instead of scanning an OFFSET
         query = query.filter(
-            (ExtractedNumber.raw_number.like(search_pattern)) |
-            (ExtractedNumber.normalized_number.like(search_pattern))
+            tuple_(ExtractedNumber.extracted_at, ExtractedNumber.id) < decode_cursor(cursor)
         )
+    else:
+        query = query.offset((page - 1) * limit)
+    numbers = query.limit(limit + 1).all()
+
+    # The extra row only tells us whether another page exists
+    has_next = len(numbers) > limit
+    numbers = numbers[:limit]
+
+    # Get comparison status and groups for the whole page in one query each
+    match_types = {}
+    groups_by_number = defaultdict(list)
+    if numbers:
+        page_ids = [n.id for n in numbers]
+        match_types = dict(db.query(
+            ComparisonResult.extracted_number_id,
+            ComparisonResult.match_type
+        ).filter(
+            ComparisonResult.extracted_number_id.in_(page_ids)
+        ).all())
+
+        group_rows = db.query(
+            number_groups.c.extracted_number_id,
+            Group.id,
+            Group.name,
+            Group.color
+        ).join(
+            Group, Group.id == number_groups.c.group_id
+        ).filter(
+            number_groups.c.extracted_number_id.in_(page_ids)
+        ).all()
+        for number_id, group_id, name, color in group_rows:
+            groups_by_number[number_id].append({"id": group_id, "name": name, "color": color})
 
-    total = query.count()
-    numbers = query.order_by(ExtractedNumber.extracted_at.desc()) \
-        .offset((page - 1) * limit) \
-        .limit(limit) \
-        .all()
-
-    # Get comparison status for each number
     items = []
     for num in numbers:
-        comparison = db.query(ComparisonResult).filter(
-            ComparisonResult.extracted_number_id == num.id
-        ).first()
-
         status = "unknown"
-        if comparison:
-            status = "existing" if comparison.match_type in ["exact", "partial"] else "new"
+        if num.id in match_types:
+            status = "existing" if match_types[num.id] in ["exact", "partial"] else "new"
 
         items.append({
             "id": num.id,
@@ -64,7 +142,7 @@ async def list_numbers(
             "number_type": num.number_type,
             "is_valid": num.is_valid,
             "extracted_at": num.extracted_at.isoformat(),
-            "groups": [{"id": g.id, "name": g.name, "color": g.color} for g in num.groups],
+            "groups": groups_by_number[num.id],
             "comparison_status": status
         })
 
@@ -73,12 +151,14 @@ async def list_numbers(
         "total": total,
         "page": page,
         "limit": limit,
-        "pages": (total + limit - 1) // limit
+        "pages": (total + limit - 1) // limit if total is not None else None,
+        "has_next": has_next,
+        "next_cursor": encode_cursor(numbers[-1].extracted_at, numbers[-1].id) if has_next else None
     }
 
 
 @router.get("/by-country", response_model=List[dict])
-async def get_numbers_by_country(
+def get_numbers_by_country(
     db: Session = Depends(get_db)
 ):
     """Get numbers grouped by country code."""
@@ -96,12 +176,31 @@ async def get_numbers_by_country(
         func.count(ExtractedNumber.id).desc()
     ).all()
 
+    # Fetch up to 100 recent numbers per country in one windowed query
+    rn = func.row_number().over(
+        partition_by=ExtractedNumber.country_code,
+        order_by=ExtractedNumber.extracted_at.desc()
+    ).label('rn')
+    ranked = db.query(
+        ExtractedNumber.id,
+        ExtractedNumber.country_code,
+        ExtractedNumber.raw_number,
+        ExtractedNumber.normalized_number,
+        ExtractedNumber.is_valid,
+        rn
+    ).filter(
+        ExtractedNumber.country_code.isnot(None)
+    ).subquery()
+
+    samples = db.query(ranked).filter(ranked.c.rn <= 100).order_by(ranked.c.rn).all()
+
+    numbers_by_country = defaultdict(list)
+    for n in samples:
+        numbers_by_country[n.country_code].append(n)
+
     result = []
     for cc, cn, count in country_counts:
-        # Get numbers for this country
-        numbers = db.query(ExtractedNumber).filter(
-            ExtractedNumber.country_code == cc
-        ).limit(100).all()
+        numbers = numbers_by_country[cc]
 
         result.append({
             "country_code": cc,
@@ -122,7 +221,7 @@ async def get_numbers_by_country(
 
 
 @router.get("/duplicates", response_model=List[dict])
-async def find_duplicates(
+def find_duplicates(
     db: Session = Depends(get_db)
 ):
     """Find duplicate phone numbers across screenshots."""
@@ -138,12 +237,18 @@ async def find_duplicates(
         func.count(ExtractedNumber.id) > 1
     ).all()
 
-    result = []
-    for norm_number, count in duplicates:
-        # Get all instances
+    # Get all instances of every duplicated number in one query
+    instances_by_number = defaultdict(list)
+    if duplicates:
         instances = db.query(ExtractedNumber).filter(
-            ExtractedNumber.normalized_number == norm_number
+            ExtractedNumber.normalized_number.in_([norm for norm, _ in duplicates])
         ).all()
+        for n in instances:
+            instances_by_number[n.normalized_number].append(n)
+
+    result = []
+    for norm_number, count in duplicates:
+        instances = instances_by_number[norm_number]
 
         result.append({
             "normalized_number": norm_number,
@@ -162,13 +267,13 @@ async def find_duplicates(
     return result
 
 
-@router.get("/stats", response_model=dict)
-async def get_numbers_stats(
-    db: Session = Depends(get_db)
-):
-    """Get statistics about extracted numbers."""
-    total = db.query(ExtractedNumber).count()
-    valid = db.query(ExtractedNumber).filter(ExtractedNumber.is_valid == True).count()
+def compute_numbers_stats(db: Session) -> dict:
+    """Aggregate totals, top countries and number types."""
+    # Total and valid counts in a single scan
+    total, valid = db.query(
+        func.count(ExtractedNumber.id),
+        func.coalesce(func.sum(case((ExtractedNumber.is_valid == True, 1), else_=0)), 0)
+    ).one()
     invalid = total - valid
 
     # Count by country
@@ -210,8 +315,28 @@ async def get_numbers_stats(
     }
 
 
+@router.get("/stats", response_model=dict)
+def get_numbers_stats(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    """Get statistics about extracted numbers."""
+    cached = stats_cache.get()
+    if cached is None:
+        version = stats_cache.current_version()
+        cached = stats_cache.store(version, compute_numbers_stats(db))
+    stats, etag = cached
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return stats
+
+
 @router.delete("/{number_id}")
-async def delete_number(
+def delete_number(
     number_id: str,
     db: Session = Depends(get_db)
 ):
@@ -223,12 +348,13 @@ async def delete_number(
 
     db.delete(number)
     db.commit()
+    stats_cache.invalidate()
 
     return {"message": "Number deleted successfully"}
 
 
 @router.delete("")
-async def bulk_delete_numbers(
+def bulk_delete_numbers(
     number_ids: List[str],
     db: Session = Depends(get_db)
 ):
@@ -238,5 +364,6 @@ async def bulk_delete_numbers(
     ).delete(synchronize_session=False)
 
     db.commit()
+    stats_cache.invalidate()
 
     return {"deleted": deleted}
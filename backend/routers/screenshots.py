@@ -1,19 +1,47 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from typing import List, Optional
 import os
 import uuid
 import aiofiles
+import aiofiles.os
 from datetime import datetime
 
-from database import get_db
+from database import get_db, count_rows
 from models import Screenshot, ExtractedNumber
 from schemas import ScreenshotResponse, ScreenshotListResponse
+from services import stats_cache
 
 router = APIRouter()
 
 UPLOAD_DIR = os.getenv("UPLOAD_DIR", "./uploads")
 MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", 10485760))  # 10MB default
+UPLOAD_CHUNK_SIZE = 65536  # Bytes read per chunk when saving uploads
+
+
+def _save_screenshots(db: Session, created: List[Screenshot]) -> List[dict]:
+    """Save all records in one transaction; flush populates ids and dates."""
+    db.add_all(created)
+    db.flush()
+    uploaded = [
+        {
+            "id": screenshot.id,
+            "filename": screenshot.filename,
+            "upload_date": screenshot.upload_date.isoformat()
+        }
+        for screenshot in created
+    ]
+    db.commit()
+    return uploaded
+
+
+def _delete_screenshot_record(db: Session, screenshot: Screenshot):
+    """Delete from database (cascade will delete extracted numbers)."""
+    db.delete(screenshot)
+    db.commit()
+    stats_cache.invalidate()
 
 
 @router.post("/upload", response_model=dict)
@@ -23,7 +51,7 @@ async def upload_screenshots(
     db: Session = Depends(get_db)
 ):
     """Upload one or more screenshots."""
-    uploaded = []
+    created = []
     errors = []
 
     for file in files:
@@ -38,34 +66,40 @@ async def upload_screenshots(
             unique_filename = f"{uuid.uuid4()}{ext}"
             file_path = os.path.join(UPLOAD_DIR, unique_filename)
 
-            # Save file
+            # Reject early when the client declared the size
+            if file.size is not None and file.size > MAX_UPLOAD_SIZE:
+                errors.append({"filename": file.filename, "error": "File too large"})
+                continue
+
+            # Save file in chunks, stopping as soon as it exceeds the limit
+            size = 0
+            too_large = False
             async with aiofiles.open(file_path, 'wb') as out_file:
-                content = await file.read()
-                if len(content) > MAX_UPLOAD_SIZE:
-                    errors.append({"filename": file.filename, "error": "File too large"})
-                    continue
-                await out_file.write(content)
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > MAX_UPLOAD_SIZE:
+                        too_large = True
+                        break
+                    await out_file.write(chunk)
+
+            if too_large:
+                await aiofiles.os.remove(file_path)
+                errors.append({"filename": file.filename, "error": "File too large"})
+                continue
 
             # Create database record
-            screenshot = Screenshot(
+            created.append(Screenshot(
                 filename=file.filename or unique_filename,
                 file_path=file_path,
                 source=source,
                 processed=False
-            )
-            db.add(screenshot)
-            db.commit()
-            db.refresh(screenshot)
-
-            uploaded.append({
-                "id": screenshot.id,
-                "filename": screenshot.filename,
-                "upload_date": screenshot.upload_date.isoformat()
-            })
+            ))
 
         except Exception as e:
             errors.append({"filename": file.filename, "error": str(e)})
 
+    uploaded = await run_in_threadpool(_save_screenshots, db, created)
+
     return {
         "uploaded": len(uploaded),
         "errors": len(errors),
@@ -75,32 +109,52 @@ async def upload_screenshots(
 
 
 @router.get("", response_model=dict)
-async def list_screenshots(
+def list_screenshots(
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
     processed: Optional[bool] = None,
     source: Optional[str] = None,
+    include_total: bool = Query(True, description="Include total count; disable for faster paging"),
     db: Session = Depends(get_db)
 ):
     """List all screenshots with pagination."""
-    query = db.query(Screenshot)
+    # Select only the columns in the response (skips ocr_text and notes)
+    query = db.query(
+        Screenshot.id,
+        Screenshot.filename,
+        Screenshot.upload_date,
+        Screenshot.processed,
+        Screenshot.source
+    )
 
     if processed is not None:
         query = query.filter(Screenshot.processed == processed)
     if source:
         query = query.filter(Screenshot.source == source)
 
-    total = query.count()
+    total = count_rows(db, query, Screenshot) if include_total else None
     screenshots = query.order_by(Screenshot.upload_date.desc()) \
         .offset((page - 1) * limit) \
-        .limit(limit) \
+        .limit(limit + 1) \
         .all()
 
+    # The extra row only tells us whether another page exists
+    has_next = len(screenshots) > limit
+    screenshots = screenshots[:limit]
+
+    # Count numbers for the whole page in one aggregate query
+    counts = {}
+    if screenshots:
+        counts = dict(db.query(
+            ExtractedNumber.screenshot_id,
+            func.count(ExtractedNumber.id)
+        ).filter(
+            ExtractedNumber.screenshot_id.in_([s.id for s in screenshots])
+        ).group_by(ExtractedNumber.screenshot_id).all())
+
     items = []
     for s in screenshots:
-        numbers_count = db.query(ExtractedNumber).filter(
-            ExtractedNumber.screenshot_id == s.id
-        ).count()
+        numbers_count = counts.get(s.id, 0)
         items.append({
             "id": s.id,
             "filename": s.filename,
@@ -115,12 +169,13 @@ async def list_screenshots(
         "total": total,
         "page": page,
         "limit": limit,
-        "pages": (total + limit - 1) // limit
+        "pages": (total + limit - 1) // limit if total is not None else None,
+        "has_next": has_next
     }
 
 
 @router.get("/{screenshot_id}", response_model=ScreenshotResponse)
-async def get_screenshot(
+def get_screenshot(
     screenshot_id: str,
     db: Session = Depends(get_db)
 ):
@@ -139,27 +194,24 @@ async def delete_screenshot(
     db: Session = Depends(get_db)
 ):
     """Delete a screenshot and its extracted numbers."""
-    screenshot = db.query(Screenshot).filter(Screenshot.id == screenshot_id).first()
+    screenshot = await run_in_threadpool(db.get, Screenshot, screenshot_id)
 
     if not screenshot:
         raise HTTPException(status_code=404, detail="Screenshot not found")
 
-    # Delete the file
+    # Delete the file off the event loop; a missing file is ignored like any other failure
     try:
-        if os.path.exists(screenshot.file_path):
-            os.remove(screenshot.file_path)
+        await aiofiles.os.remove(screenshot.file_path)
     except Exception:
         pass  # Continue even if file deletion fails
 
-    # Delete from database (cascade will delete extracted numbers)
-    db.delete(screenshot)
-    db.commit()
+    await run_in_threadpool(_delete_screenshot_record, db, screenshot)
 
     return {"message": "Screenshot deleted successfully"}
 
 
 @router.patch("/{screenshot_id}")
-async def update_screenshot(
+def update_screenshot(
     screenshot_id: str,
     source: Optional[str] = None,
     notes: Optional[str] = None,
@@ -1,6 +1,19 @@
+import csv
+import io
 import pandas as pd
-from typing import Dict, List, Optional
-from services.phone_parser import normalize_for_comparison, get_country_from_number
+from typing import Dict, Iterator, List, Optional, BinaryIO, Set, Union
+from services.phone_parser import normalize_for_comparison
+
+try:
+    # Optional: Arrow's multithreaded CSV reader with Arrow-backed string columns
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa = None
+
+PREVIEW_MAX_BYTES = 65536  # Most bytes read from a CSV to build a preview
+IMPORT_CHUNK_SIZE = 50000  # CSV rows parsed and inserted per chunk on import
+ARROW_BLOCK_SIZE = 8 << 20  # Bytes of CSV per chunk when reading with pyarrow
 
 # Common Zoho CRM column names for phone numbers
 ZOHO_PHONE_COLUMNS = [
@@ -88,10 +101,35 @@ def detect_columns(columns: List[str]) -> Dict[str, Optional[str]]:
     return mapping
 
 
-def preview_csv(file_path: str, rows: int = 5) -> Dict:
-    """Preview CSV file and suggest column mappings."""
+def read_csv_head(csv_file: Union[str, BinaryIO], rows: int) -> bytes:
+    """Read the header plus up to `rows` lines without reading past PREVIEW_MAX_BYTES."""
+    if isinstance(csv_file, str):
+        with open(csv_file, 'rb') as f:
+            head = f.read(PREVIEW_MAX_BYTES)
+    else:
+        head = csv_file.read(PREVIEW_MAX_BYTES)
+
+    pos = -1
+    for _ in range(rows + 1):
+        pos = head.find(b'\n', pos + 1)
+        if pos == -1:
+            # Fewer lines than requested: drop a trailing partial line if we hit the cap
+            if len(head) == PREVIEW_MAX_BYTES and b'\n' in head:
+                return head[:head.rfind(b'\n') + 1]
+            return head
+    return head[:pos + 1]
+
+
+def preview_csv(csv_file: Union[str, BinaryIO], rows: int = 5) -> Dict:
+    """Preview CSV file (path or file object) and suggest column mappings."""
     try:
-        df = pd.read_csv(file_path, nrows=rows)
+        try:
+            df = pd.read_csv(io.BytesIO(read_csv_head(csv_file, rows)), nrows=rows)
+        except pd.errors.ParserError:
+            # A quoted field spanning the cut-off line; parse from the start instead
+            if not isinstance(csv_file, str):
+                csv_file.seek(0)
+            df = pd.read_csv(csv_file, nrows=rows)
         columns = df.columns.tolist()
         suggested_mapping = detect_columns(columns)
 
@@ -104,8 +142,118 @@ def preview_csv(file_path: str, rows: int = 5) -> Dict:
         raise Exception(f"Failed to read CSV: {str(e)}")
 
 
+def read_csv_header(csv_file: Union[str, BinaryIO]) -> List[str]:
+    """
+    Column names from the first line of a CSV, leaving a file object's position unchanged.
+
+    Names are deduplicated by pandas ('Phone', 'Phone.1'), so both readers
+    and the preview agree on them.
+    """
+    if isinstance(csv_file, str):
+        with open(csv_file, 'rb') as f:
+            line = f.readline()
+    else:
+        pos = csv_file.tell()
+        line = csv_file.readline()
+        csv_file.seek(pos)
+    try:
+        return pd.read_csv(io.BytesIO(line), nrows=0).columns.tolist()
+    except pd.errors.EmptyDataError:
+        return []
+
+
+def read_csv_chunks(csv_file: Union[str, BinaryIO], columns: Set[str]) -> Iterator[pd.DataFrame]:
+    """
+    Yield the CSV in chunks, keeping only `columns` as strings with blanks as ''.
+
+    Streams through pyarrow when it is installed, otherwise through pandas'
+    chunked C reader. Mapped columns missing from the file are left out.
+    Ragged rows are padded or cut to the header, as pandas does with usecols.
+    """
+    if pa is None:
+        yield from pd.read_csv(
+            csv_file,
+            chunksize=IMPORT_CHUNK_SIZE,
+            usecols=lambda col: col in columns,
+            dtype=str,
+            keep_default_na=False
+        )
+        return
+
+    header = read_csv_header(csv_file)
+    present = [col for col in header if col in columns]
+    positions = [header.index(col) for col in present]
+
+    # Arrow can only skip ragged rows, so fit them to the header here and
+    # yield them after the batch they were read with
+    padded = []
+
+    def pad_ragged_row(row):
+        fields = next(csv.reader([row.text]), [])
+        fields += [''] * (len(header) - len(fields))
+        padded.append([fields[i] for i in positions])
+        return 'skip'
+
+    def take_padded():
+        rows, padded[:] = padded[:], []
+        return pd.DataFrame(rows, columns=present, dtype=pd.ArrowDtype(pa.string()))
+
+    reader = pa_csv.open_csv(
+        csv_file,
+        # Use the deduplicated names; Arrow would keep repeated ones as-is
+        read_options=pa_csv.ReadOptions(
+            block_size=ARROW_BLOCK_SIZE,
+            skip_rows=1,
+            column_names=header
+        ),
+        parse_options=pa_csv.ParseOptions(
+            newlines_in_values=True,
+            invalid_row_handler=pad_ragged_row
+        ),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=present,
+            column_types={col: pa.string() for col in present}
+        )
+    )
+    try:
+        for batch in reader:
+            if batch.num_rows:
+                yield batch.to_pandas(types_mapper=pd.ArrowDtype)
+            if padded:
+                yield take_padded()
+        if padded:
+            yield take_padded()
+    finally:
+        # Stop the background readahead if the import bails out early
+        reader.close()
+
+
+def insert_new_contacts(db_session, model):
+    """
+    INSERT for contacts that skips numbers already stored, returning inserted ids.
+
+    Uses ON CONFLICT DO NOTHING on the unique normalized_number, so duplicate
+    checks happen in the database index instead of a Python set of every
+    existing number, and stay correct if two imports run at once.
+
+    Returns None on dialects without ON CONFLICT; the caller then filters
+    out stored numbers itself and uses a plain INSERT.
+    """
+    dialect = db_session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+
+    return insert(model).on_conflict_do_nothing(
+        index_elements=['normalized_number']
+    ).returning(model.id)
+
+
 def import_contacts_from_csv(
-    file_path: str,
+    csv_file: Union[str, BinaryIO],
     column_mapping: Dict[str, str],
     db_session
 ) -> Dict:
@@ -113,13 +261,15 @@ def import_contacts_from_csv(
     Import contacts from CSV file.
 
     Args:
-        file_path: Path to CSV file
+        csv_file: Path to CSV file or a file object with its contents
         column_mapping: Mapping of field names to CSV columns
         db_session: SQLAlchemy database session
 
     Returns:
         Import statistics
     """
+    from sqlalchemy import insert, select
+    from database import INSERT_PAGE_SIZE
     from models import ExistingContact
 
     stats = {
@@ -130,73 +280,95 @@ def import_contacts_from_csv(
         'invalid_phones': 0
     }
 
+    reader = None
     try:
-        df = pd.read_csv(file_path)
-        stats['total_rows'] = len(df)
-
         phone_col = column_mapping.get('phone')
-        if not phone_col or phone_col not in df.columns:
-            raise ValueError("Phone column not found in CSV")
-
-        name_col = column_mapping.get('name')
-        email_col = column_mapping.get('email')
-        company_col = column_mapping.get('company')
-        zoho_id_col = column_mapping.get('zoho_id')
-
-        # Get existing normalized numbers for duplicate checking
-        existing_numbers = set(
-            row[0] for row in db_session.query(ExistingContact.normalized_number).all()
-            if row[0]
-        )
-
-        contacts_to_add = []
-
-        for _, row in df.iterrows():
-            raw_phone = str(row.get(phone_col, '')).strip()
-
-            if not raw_phone or raw_phone == 'nan':
-                stats['skipped'] += 1
-                continue
-
-            # Normalize the phone number
-            normalized = normalize_for_comparison(raw_phone)
-
-            if not normalized:
-                stats['invalid_phones'] += 1
-                continue
-
-            # Check for duplicates
-            if normalized in existing_numbers:
-                stats['duplicates'] += 1
-                continue
-
-            # Mark as seen
-            existing_numbers.add(normalized)
-
-            # Get country info
-            country_info = get_country_from_number(normalized)
-
-            # Build contact record
-            contact = ExistingContact(
-                normalized_number=normalized,
-                raw_number=raw_phone,
-                name=str(row.get(name_col, '')).strip() if name_col and name_col in df.columns else None,
-                email=str(row.get(email_col, '')).strip() if email_col and email_col in df.columns else None,
-                company=str(row.get(company_col, '')).strip() if company_col and company_col in df.columns else None,
-                zoho_id=str(row.get(zoho_id_col, '')).strip() if zoho_id_col and zoho_id_col in df.columns else None,
-                source='zoho_csv'
-            )
+        optional_columns = {
+            field: column_mapping.get(field)
+            for field in ('name', 'email', 'company', 'zoho_id')
+        }
 
-            contacts_to_add.append(contact)
-            stats['imported'] += 1
+        # Check the mapping against the header, so a file with no data rows
+        # still fails on a missing phone column
+        header = read_csv_header(csv_file)
+        if not phone_col or phone_col not in header:
+            raise ValueError("Phone column not found in CSV")
+        field_columns = {
+            field: col for field, col in optional_columns.items()
+            if col and col in header
+        }
 
-        # Bulk insert
-        if contacts_to_add:
-            db_session.bulk_save_objects(contacts_to_add)
-            db_session.commit()
+        # Only parse the mapped columns, as plain strings with blanks left as ''
+        needed = {col for col in column_mapping.values() if col}
+        reader = read_csv_chunks(csv_file, needed)
+
+        stmt = insert_new_contacts(db_session, ExistingContact)
+        existing_numbers = None
+        if stmt is None:
+            # No ON CONFLICT here: check against every stored number instead,
+            # in a set that each chunk adds what it imports to
+            stmt = insert(ExistingContact)
+            existing_numbers = set(db_session.scalars(
+                select(ExistingContact.normalized_number).where(
+                    ExistingContact.normalized_number.isnot(None)
+                )
+            ))
+
+        for df in reader:
+            stats['total_rows'] += len(df)
+
+            # Clean and normalize the phone column as a whole instead of row by row
+            phones = df[phone_col].str.strip()
+            valid_mask = phones != ''
+            stats['skipped'] += int((~valid_mask).sum())
+
+            normalized = phones[valid_mask].map(normalize_for_comparison)
+            normalized = normalized[normalized != '']
+            stats['invalid_phones'] += int(valid_mask.sum()) - len(normalized)
+
+            # Drop repeats within the chunk; numbers already stored are
+            # skipped by the database on insert
+            new_mask = ~normalized.duplicated()
+            if existing_numbers is not None:
+                new_mask &= ~normalized.map(existing_numbers.__contains__).astype(bool)
+                existing_numbers.update(normalized[new_mask])
+            stats['duplicates'] += len(normalized) - int(new_mask.sum())
+            normalized = normalized[new_mask]
+
+            # One aligned frame of insert rows; no ORM objects are built.
+            # Unmapped or missing fields are left out and insert as NULL
+            records = pd.DataFrame({
+                'normalized_number': normalized,
+                'raw_number': phones.loc[normalized.index],
+                **{
+                    field: df[col].loc[normalized.index].str.strip()
+                    for field, col in field_columns.items()
+                },
+                'source': 'zoho_csv'
+            }, index=normalized.index)
+            rows = records.to_dict(orient='records')
+
+            # Insert each chunk through Core in INSERT_PAGE_SIZE batches;
+            # rows that hit an existing number return nothing
+            for k in range(0, len(rows), INSERT_PAGE_SIZE):
+                batch = rows[k:k + INSERT_PAGE_SIZE]
+                if existing_numbers is not None:
+                    db_session.execute(stmt, batch)
+                    stats['imported'] += len(batch)
+                    continue
+                inserted = len(db_session.execute(stmt, batch).all())
+                stats['imported'] += inserted
+                stats['duplicates'] += len(batch) - inserted
+
+        db_session.commit()
 
         return stats
 
     except Exception as e:
         db_session.rollback()
         raise Exception(f"Import failed: {str(e)}")
+    finally:
+        # Release the file and any reader threads now rather than when the
+        # traceback holding the generator is collected
+        if reader is not None:
+            reader.close()
@@ -1,8 +1,61 @@
 from PIL import Image, ImageEnhance, ImageFilter
+import numpy as np
 import pytesseract
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple, Union
+import multiprocessing
 import os
+import threading
+
+try:
+    # Drives Tesseract in-process, keeping the loaded image across passes
+    from tesserocr import PyTessBaseAPI, PSM, OEM, RIL, iterate_level
+except ImportError:
+    PyTessBaseAPI = None
+
+from services.phone_parser import WHATSAPP_RE, GENERIC_RE
+
+BILINEAR_UPSCALE_RATIO = 1.5  # Upscales at or above this use BILINEAR; thresholding hides the difference
+WHATSAPP_HEADER_COVERAGE = 0.05  # Share of header pixels in WhatsApp teal needed to detect it
+OCR_MAX_DEFAULT_WORKERS = 2  # Cap on the default pool size; set OCR_WORKERS to go higher
+OCR_MIN_CONFIDENCE = float(os.getenv("OCR_MIN_CONFIDENCE", 30))  # Words below this Tesseract confidence are dropped
+# Share of sparse-pass words that must pass OCR_MIN_CONFIDENCE to skip the PSM 6 fallback
+OCR_FALLBACK_MIN_KEPT = float(os.getenv("OCR_FALLBACK_MIN_KEPT", 0.9))
+
+# Batch OCR workers are started without fork: forking the threaded server
+# process can leave workers holding locks copied mid-use
+OCR_MP_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def default_ocr_workers() -> int:
+    """
+    Worker count for batch OCR when OCR_WORKERS is not set.
+
+    Neither cpu_count nor the affinity mask sees a container's CPU quota,
+    and each worker holds its own Tesseract, so the default stays low.
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    return max(1, min(cpus, OCR_MAX_DEFAULT_WORKERS))
+
+
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", default_ocr_workers()))  # Batch OCR worker processes; also caps in-process Tesseract APIs
+
+# Idle tesserocr APIs, reused across calls since loading the language model
+# is the costly part. An API serves one call at a time, and at most
+# OCR_WORKERS exist per process, however many threads the server runs OCR in
+_tess_idle = []
+_tess_lock = threading.Lock()
+_tess_slots = threading.BoundedSemaphore(OCR_WORKERS)
 
 
 def extract_text_from_image(image_path: str, source: str = 'whatsapp') -> str:
@@ -26,22 +79,219 @@ def extract_text_from_image(image_path: str, source: str = 'whatsapp') -> str:
         else:
             image = preprocess_generic(image)
 
+        pattern = WHATSAPP_RE if source == 'whatsapp' else GENERIC_RE
+        if PyTessBaseAPI is not None:
+            return ocr_with_tesserocr(image, pattern)
+
         # OCR with optimized config for phone numbers
-        # PSM 6: Assume uniform block of text
+        # PSM 11: Sparse text, handles contact lists and chat layouts
         # OEM 3: Default, based on what's available
-        custom_config = r'--oem 3 --psm 6'
-        text = pytesseract.image_to_string(image, config=custom_config)
+        data = pytesseract.image_to_data(
+            image,
+            config=r'--oem 3 --psm 11',
+            output_type=pytesseract.Output.DICT
+        )
+        text = words_to_text(data)
 
-        # Also try PSM 11 (sparse text) for contact lists
-        text_sparse = pytesseract.image_to_string(image, config=r'--oem 3 --psm 11')
+        # Second pass (PSM 6: uniform block of text) only when the sparse pass
+        # looks incomplete; see needs_fallback for what that misses
+        if needs_fallback(data, text, pattern):
+            text += "\n" + pytesseract.image_to_string(image, config=r'--oem 3 --psm 6')
 
-        # Combine results (dedupe later in phone parser)
-        return text + "\n" + text_sparse
+        return text
 
     except Exception as e:
         raise Exception(f"OCR failed: {str(e)}")
 
 
+def ocr_with_tesserocr(image: Image.Image, pattern) -> str:
+    """
+    Same two passes as the pytesseract path, on one in-process Tesseract.
+
+    The image is handed over once and stays loaded when the page
+    segmentation mode changes, so the fallback pass skips the temp PNG
+    and subprocess that each pytesseract call costs.
+    """
+    with tesserocr_api() as api:
+        api.SetPageSegMode(PSM.SPARSE_TEXT)
+        api.SetImage(image)
+        api.Recognize()
+        data = tesserocr_words(api)
+        text = words_to_text(data)
+
+        if needs_fallback(data, text, pattern):
+            # Resetting the rectangle clears the PSM 11 results while keeping
+            # the image loaded; otherwise GetUTF8Text returns them again
+            api.SetPageSegMode(PSM.SINGLE_BLOCK)
+            api.SetRectangle(0, 0, image.width, image.height)
+            text += "\n" + api.GetUTF8Text()
+        return text
+
+
+@contextmanager
+def tesserocr_api():
+    """Check out an idle tesserocr API, creating one if under OCR_WORKERS, waiting otherwise."""
+    with _tess_slots:
+        with _tess_lock:
+            api = _tess_idle.pop() if _tess_idle else None
+        if api is None:
+            api = PyTessBaseAPI(oem=OEM.DEFAULT)
+        try:
+            yield api
+        finally:
+            api.Clear()
+            with _tess_lock:
+                _tess_idle.append(api)
+
+
+def close_tesserocr_apis():
+    """Free the idle tesserocr APIs and their loaded models."""
+    with _tess_lock:
+        apis = _tess_idle[:]
+        _tess_idle.clear()
+    for api in apis:
+        api.End()
+
+
+def tesserocr_words(api) -> dict:
+    """Collect recognized words in the image_to_data dict layout used by words_to_text."""
+    data = {'text': [], 'conf': [], 'block_num': [], 'par_num': [], 'line_num': []}
+    block = par = line = 0
+    iterator = api.GetIterator()
+    if iterator is None:
+        return data
+
+    for word in iterate_level(iterator, RIL.WORD):
+        if word.IsAtBeginningOf(RIL.BLOCK):
+            block, par, line = block + 1, 0, 0
+        if word.IsAtBeginningOf(RIL.PARA):
+            par, line = par + 1, 0
+        if word.IsAtBeginningOf(RIL.TEXTLINE):
+            line += 1
+
+        data['text'].append(word.GetUTF8Text(RIL.WORD) or '')
+        data['conf'].append(word.Confidence(RIL.WORD))
+        data['block_num'].append(block)
+        data['par_num'].append(par)
+        data['line_num'].append(line)
+    return data
+
+
+def ocr_screenshot(image_path: str, source: Optional[str] = None) -> Tuple[str, str]:
+    """Detect source if needed and run OCR, returning (source, text)."""
+    source = source or detect_source(image_path)
+    return source, extract_text_from_image(image_path, source)
+
+
+def extract_text_from_images(
+    image_paths: List[str],
+    sources: List[Optional[str]]
+) -> List[Union[Tuple[str, str], Exception]]:
+    """
+    OCR several screenshots in parallel worker processes.
+
+    Preprocessing and Tesseract are CPU-bound, so processes scale across
+    cores where threads would contend for the GIL. Returns (source, text)
+    per image in input order, or the exception raised for that image.
+    """
+    if not image_paths:
+        return []
+
+    def submit_all(pool):
+        return [
+            pool.submit(ocr_screenshot, path, source)
+            for path, source in zip(image_paths, sources)
+        ]
+
+    pool = get_ocr_pool()
+    try:
+        futures = submit_all(pool)
+    except BrokenProcessPool:
+        # A worker died in an earlier batch; retry once on a fresh pool
+        discard_ocr_pool(pool)
+        pool = get_ocr_pool()
+        futures = submit_all(pool)
+
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except BrokenProcessPool as e:
+            discard_ocr_pool(pool)
+            results.append(e)
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def get_ocr_pool() -> ProcessPoolExecutor:
+    """Worker pool for batch OCR, started on first use and shared by all requests."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # One OpenMP thread per Tesseract, as the workers already run in
+            # parallel. os.putenv unpickles without importing this module, so
+            # it runs before the worker loads tesserocr, whose OpenMP runtime
+            # reads the limit on load; pytesseract's subprocesses inherit it
+            _pool = ProcessPoolExecutor(
+                max_workers=OCR_WORKERS,
+                mp_context=OCR_MP_CONTEXT,
+                initializer=os.putenv,
+                initargs=('OMP_THREAD_LIMIT', '1'),
+            )
+        return _pool
+
+
+def discard_ocr_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool so the next batch starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_ocr_pool():
+    """Stop the batch OCR workers and free in-process Tesseract; called on app shutdown."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+    close_tesserocr_apis()
+
+
+def words_to_text(data: dict) -> str:
+    """Rebuild line-ordered text from image_to_data output, skipping low-confidence words."""
+    lines = {}
+    for word, conf, block, par, line in zip(
+        data['text'], data['conf'], data['block_num'], data['par_num'], data['line_num']
+    ):
+        if word.strip() and float(conf) > OCR_MIN_CONFIDENCE:
+            lines.setdefault((block, par, line), []).append(word)
+
+    # Dicts keep insertion order, which follows Tesseract's reading order
+    return "\n".join(" ".join(words) for words in lines.values())
+
+
+def needs_fallback(data: dict, text: str, pattern) -> bool:
+    """
+    Whether the sparse pass may have missed numbers and PSM 6 should run too.
+
+    True when it found no number, or when more than 1 - OCR_FALLBACK_MIN_KEPT
+    of its words were dropped for low confidence, as happens when some
+    numbers on the screen were misread. A screenshot where the sparse pass
+    cleanly reads some numbers and segments others away entirely still
+    skips the fallback; that is the price of not running two passes on
+    every image.
+    """
+    if not pattern.search(text):
+        return True
+    words = [conf for word, conf in zip(data['text'], data['conf']) if word.strip()]
+    kept = sum(1 for conf in words if float(conf) > OCR_MIN_CONFIDENCE)
+    return kept < OCR_FALLBACK_MIN_KEPT * len(words)
+
+
 def preprocess_whatsapp_screenshot(image: Image.Image) -> Image.Image:
     """
     Preprocess WhatsApp screenshot for better OCR accuracy.
@@ -61,7 +311,8 @@ def preprocess_whatsapp_screenshot(image: Image.Image) -> Image.Image:
     if image.width < min_width:
         ratio = min_width / image.width
         new_size = (int(image.width * ratio), int(image.height * ratio))
-        image = image.resize(new_size, Image.Resampling.LANCZOS)
+        resample = Image.Resampling.BILINEAR if ratio >= BILINEAR_UPSCALE_RATIO else Image.Resampling.LANCZOS
+        image = image.resize(new_size, resample)
 
     # Convert to grayscale
     image = image.convert('L')
@@ -122,19 +373,15 @@ def detect_source(image_path: str) -> str:
 
         # Sample colors from the top portion (usually contains app header)
         width, height = image.size
-        header_region = image.crop((0, 0, width, min(100, height)))
-
-        # Get dominant colors
-        colors = header_region.getcolors(maxcolors=1000)
-        if not colors:
+        header = np.asarray(image.crop((0, 0, width, min(100, height))))
+        if not header.size:
             return 'unknown'
 
         # WhatsApp green: RGB around (7, 94, 84) or (18, 140, 126)
-        for count, color in sorted(colors, reverse=True)[:10]:
-            r, g, b = color[:3] if len(color) >= 3 else (0, 0, 0)
-            # Check for WhatsApp teal/green
-            if (0 <= r <= 30 and 80 <= g <= 160 and 70 <= b <= 140):
-                return 'whatsapp'
+        r, g, b = header[..., 0], header[..., 1], header[..., 2]
+        teal = (r <= 30) & (g >= 80) & (g <= 160) & (b >= 70) & (b <= 140)
+        if teal.mean() > WHATSAPP_HEADER_COVERAGE:
+            return 'whatsapp'
 
         return 'unknown'
     except Exception:
@@ -1,8 +1,16 @@
 import re
 import phonenumbers
+from functools import lru_cache
 from phonenumbers import geocoder, carrier
 from typing import List, Dict, Optional
 
+try:
+    # Optional: RE2 scans in linear time, immune to backtracking on noisy OCR text
+    import re2 as scan_re
+except ImportError:
+    scan_re = re
+
+
 # WhatsApp-specific patterns (ordered by specificity)
 WHATSAPP_PATTERNS = [
     # WhatsApp contact info format: "Phone: +1 555-123-4567"
@@ -31,8 +39,50 @@ GENERIC_PATTERNS = [
     r'(\b\d{10,12}\b)',
 ]
 
+
+def combine_patterns(patterns: List[str]):
+    """
+    Fuse patterns into one alternation, for checking whether text contains
+    anything phone-like in a single scan.
+
+    Not for extraction: the fused pattern matches at the leftmost position,
+    so a digit fragment just before a number can consume that number.
+    """
+    return scan_re.compile('(?i)' + '|'.join(f'(?:{p})' for p in patterns))
+
+
+WHATSAPP_RE = combine_patterns(WHATSAPP_PATTERNS)
+GENERIC_RE = combine_patterns(GENERIC_PATTERNS)
+# Individual patterns, each scanned over the whole text during extraction
+WHATSAPP_EACH_RE = [scan_re.compile('(?i)' + p) for p in WHATSAPP_PATTERNS]
+GENERIC_EACH_RE = [scan_re.compile('(?i)' + p) for p in GENERIC_PATTERNS]
+PREFIX_RE = re.compile(r'^(Phone|Mobile|Cell)[\s:]+', re.IGNORECASE)
+NON_DIGIT_RE = re.compile(r'[^\d]')
+E164_RE = re.compile(r'\+\d{10,15}')
+
 # Priority regions for parsing (US and India primary)
 PRIORITY_REGIONS = ['US', 'IN', 'CA', 'GB', 'AU', 'AE', 'PK', 'BD']
+# Narrowed region lists by input shape; CA shares US metadata (+1) and a
+# missing region only parses '+' input, so neither can add a match here
+NATIONAL_REGIONS = [r for r in PRIORITY_REGIONS if r != 'CA']
+TEN_DIGIT_MOBILE_REGIONS = ['US', 'IN']
+INTERNATIONAL_REGIONS = [None]
+
+# Resolved once rather than through attribute chains on every parse
+E164 = phonenumbers.PhoneNumberFormat.E164
+country_name_for_number = geocoder.country_name_for_number
+carrier_name_for_number = carrier.name_for_number
+
+PARSE_CACHE_SIZE = 131072  # Distinct number strings memoized by the parse helpers
+
+INVALID_NUMBER = {
+    'normalized': None,
+    'country_code': None,
+    'country_name': None,
+    'carrier': None,
+    'is_valid': False,
+    'number_type': None
+}
 
 
 def extract_phones_from_text(text: str, source: str = 'whatsapp') -> List[Dict]:
@@ -51,26 +101,22 @@ def extract_phones_from_text(text: str, source: str = 'whatsapp') -> List[Dict]:
         'number_type': 'MOBILE'
     }
     """
-    candidates = []
-
     # Use source-specific patterns
-    patterns = WHATSAPP_PATTERNS if source == 'whatsapp' else GENERIC_PATTERNS
+    patterns = WHATSAPP_EACH_RE if source == 'whatsapp' else GENERIC_EACH_RE
 
-    for pattern in patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        candidates.extend(matches)
+    # Clean and deduplicate candidates as they are found
+    candidates = []
+    seen_candidates = set()
 
-    # Clean and deduplicate candidates
-    cleaned_candidates = []
-    for c in candidates:
-        # Remove common WhatsApp prefixes
-        cleaned = re.sub(r'^(Phone|Mobile|Cell)[\s:]+', '', c, flags=re.IGNORECASE)
-        cleaned = cleaned.strip()
-        if cleaned and len(cleaned) >= 7:  # Minimum viable phone length
-            cleaned_candidates.append(cleaned)
+    for pattern in patterns:
+        for m in pattern.finditer(text):
+            # Remove common WhatsApp prefixes
+            cleaned = PREFIX_RE.sub('', m.group(1)).strip()
 
-    # Remove duplicates while preserving order
-    candidates = list(dict.fromkeys(cleaned_candidates))
+            # Minimum viable phone length
+            if len(cleaned) >= 7 and cleaned not in seen_candidates:
+                seen_candidates.add(cleaned)
+                candidates.append(cleaned)
 
     results = []
     seen_normalized = set()
@@ -78,14 +124,11 @@ def extract_phones_from_text(text: str, source: str = 'whatsapp') -> List[Dict]:
     for candidate in candidates:
         parsed_info = parse_phone_number(candidate)
         if parsed_info:
-            # Skip if we've already seen this normalized number
-            norm = parsed_info.get('normalized')
-            if norm and norm not in seen_normalized:
-                seen_normalized.add(norm)
-                results.append(parsed_info)
-            elif not norm and parsed_info.get('raw') not in seen_normalized:
-                # Keep invalid numbers too, but dedupe by raw
-                seen_normalized.add(parsed_info.get('raw'))
+            # Skip if we've already seen this normalized number; invalid
+            # numbers are kept too, but deduped by raw
+            key = parsed_info.get('normalized') or parsed_info.get('raw')
+            if key not in seen_normalized:
+                seen_normalized.add(key)
                 results.append(parsed_info)
 
     return results
@@ -95,10 +138,36 @@ def parse_phone_number(raw_number: str) -> Optional[Dict]:
     """Parse a single phone number string."""
 
     # Clean up the string but preserve + prefix
-    cleaned = raw_number.strip()
+    return {'raw': raw_number, **_parse_cleaned(raw_number.strip())}
 
-    # Try parsing with each priority region
-    for region in PRIORITY_REGIONS + [None]:
+
+def candidate_regions(cleaned: str) -> List[Optional[str]]:
+    """
+    Pick the regions worth trying for a cleaned number, in priority order.
+
+    libphonenumber ignores the region for '+' input unless an IDD prefix
+    follows, and 10-digit numbers starting 6-9 always resolve as US or IN.
+    """
+    digits = NON_DIGIT_RE.sub('', cleaned)
+    if cleaned.startswith('+') and not digits.startswith('0'):
+        return INTERNATIONAL_REGIONS
+    if len(digits) == 10 and digits[0] in '6789':
+        return TEN_DIGIT_MOBILE_REGIONS
+    if cleaned.startswith('+'):
+        return PRIORITY_REGIONS + [None]
+    return NATIONAL_REGIONS
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_cleaned(cleaned: str) -> Dict:
+    """
+    Resolve a cleaned number against the priority regions.
+
+    Memoized because OCR passes and re-imports repeat the same strings;
+    callers get the result merged into a fresh dict, so it is never mutated.
+    """
+    # Try parsing with each region that could match this input
+    for region in candidate_regions(cleaned):
         try:
             parsed = phonenumbers.parse(cleaned, region)
 
@@ -107,14 +176,10 @@ def parse_phone_number(raw_number: str) -> Optional[Dict]:
                 number_type_str = str(number_type_val).split('.')[-1] if number_type_val else None
 
                 return {
-                    'raw': raw_number,
-                    'normalized': phonenumbers.format_number(
-                        parsed,
-                        phonenumbers.PhoneNumberFormat.E164
-                    ),
+                    'normalized': phonenumbers.format_number(parsed, E164),
                     'country_code': f'+{parsed.country_code}',
-                    'country_name': geocoder.country_name_for_number(parsed, 'en') or 'Unknown',
-                    'carrier': carrier.name_for_number(parsed, 'en') or None,
+                    'country_name': country_name_for_number(parsed, 'en') or 'Unknown',
+                    'carrier': carrier_name_for_number(parsed, 'en') or None,
                     'is_valid': True,
                     'number_type': number_type_str
                 }
@@ -122,35 +187,67 @@ def parse_phone_number(raw_number: str) -> Optional[Dict]:
             continue
 
     # Return as invalid if parsing failed
-    return {
-        'raw': raw_number,
-        'normalized': None,
-        'country_code': None,
-        'country_name': None,
-        'carrier': None,
-        'is_valid': False,
-        'number_type': None
-    }
+    return INVALID_NUMBER
 
 
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
 def normalize_for_comparison(number: str) -> str:
     """Normalize number for comparison (strips formatting)."""
     if not number:
         return ''
 
+    # Fast path for input that is already E.164, the common case for CRM exports
+    candidate = number.strip()
+    if E164_RE.fullmatch(candidate) and _is_plain_e164(candidate):
+        return candidate
+
     # Try US first, then India (primary regions)
     for region in ['US', 'IN']:
         try:
             parsed = phonenumbers.parse(number, region)
             if phonenumbers.is_valid_number(parsed):
-                return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
+                return phonenumbers.format_number(parsed, E164)
         except Exception:
             continue
 
     # Fallback: just keep digits and + prefix
     if number.startswith('+'):
-        return '+' + re.sub(r'[^\d]', '', number[1:])
-    return re.sub(r'[^\d]', '', number)
+        return '+' + NON_DIGIT_RE.sub('', number[1:])
+    return NON_DIGIT_RE.sub('', number)
+
+
+def _is_plain_e164(number: str) -> bool:
+    """
+    Check that an E.164-shaped number parses back unchanged: its country code
+    is known and no national prefix that libphonenumber strips follows it
+    (+44 020..., +1 1..., +7 8...).
+    """
+    for length in (1, 2, 3):
+        national_prefix = _national_prefix_re(int(number[1:1 + length]))
+        if national_prefix is not False:
+            if national_prefix is None:
+                return True
+            # An empty match (e.g. AR's optional groups) strips nothing
+            match = national_prefix.match(number, 1 + length)
+            return match is None or match.end() == 1 + length
+    return False
+
+
+@lru_cache(maxsize=None)
+def _national_prefix_re(country_code: int):
+    """
+    Compiled national_prefix_for_parsing of a calling code's main region,
+    None if it has none, or False for an unknown calling code.
+    """
+    region = phonenumbers.region_code_for_country_code(country_code)
+    if region == phonenumbers.UNKNOWN_REGION:
+        return False
+    if region == phonenumbers.REGION_CODE_FOR_NON_GEO_ENTITY:
+        metadata = phonenumbers.PhoneMetadata.metadata_for_nongeo_region(country_code)
+    else:
+        metadata = phonenumbers.PhoneMetadata.metadata_for_region(region)
+    pattern = metadata.national_prefix_for_parsing if metadata else None
+    return re.compile(pattern) if pattern else None
 
 
 def get_country_from_number(normalized_number: str) -> Dict:
@@ -162,7 +259,22 @@ def get_country_from_number(normalized_number: str) -> Dict:
         parsed = phonenumbers.parse(normalized_number)
         return {
             'country_code': f'+{parsed.country_code}',
-            'country_name': geocoder.country_name_for_number(parsed, 'en') or 'Unknown'
+            'country_name': country_name_for_number(parsed, 'en') or 'Unknown'
         }
     except Exception:
         return {'country_code': None, 'country_name': None}
+
+
+def suffix_key(number: str, length: int = 10) -> Optional[int]:
+    """
+    Pack the last `length` digits of a number into an int for partial matching.
+
+    Returns None if the number is too short or its tail is not all digits.
+    """
+    if not number or len(number) < length:
+        return None
+
+    tail = number[-length:]
+    if not (tail.isascii() and tail.isdigit()):
+        return None
+    return int(tail)
@@ -0,0 +1,48 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional, Tuple
+
+STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", 15))  # Seconds a stats payload is reused
+
+_lock = threading.Lock()
+_version = 0
+_entry = None  # (version, expires_at, payload, etag)
+
+
+def current_version() -> int:
+    """Version to pass to store(); read it before computing the payload."""
+    return _version
+
+
+def invalidate():
+    """Drop the cached stats; call after extracted numbers change."""
+    global _version, _entry
+    with _lock:
+        _version += 1
+        _entry = None
+
+
+def get() -> Optional[Tuple[dict, str]]:
+    """Return (payload, etag) if a fresh entry exists for the current version."""
+    entry = _entry
+    if entry and entry[0] == _version and entry[1] > time.monotonic():
+        return entry[2], entry[3]
+    return None
+
+
+def store(version: int, payload: dict) -> Tuple[dict, str]:
+    """Cache payload computed at version and return it with its ETag."""
+    global _entry
+    digest = hashlib.blake2b(
+        json.dumps(payload, sort_keys=True, default=str).encode(), digest_size=16
+    ).hexdigest()
+    etag = f'"{digest}"'
+
+    with _lock:
+        # Skip caching if numbers changed while the payload was being computed
+        if version == _version:
+            _entry = (version, time.monotonic() + STATS_CACHE_TTL, payload, etag)
+    return payload, etag
@@ -0,0 +1,97 @@
+import io
+
+import pytest
+
+import services.csv_importer as csv_importer
+from models import ExistingContact
+
+CSV = (
+    'Phone,Name,Notes\n'
+    '+14155552671,a,"x\ny"\n'
+    '+1 415 555 2671,b,\n'
+    '9876543210,c,\n'
+    ',d,\n'
+    '+14155552671,e,\n'
+    '12,f,\n'
+)
+
+
+def run_import(db, data, mapping=None):
+    return csv_importer.import_contacts_from_csv(
+        io.BytesIO(data.encode()), mapping or {'phone': 'Phone', 'name': 'Name'}, db
+    )
+
+
+def stored(db):
+    return sorted((c.normalized_number, c.name) for c in db.query(ExistingContact))
+
+
+@pytest.mark.parametrize('on_conflict', [True, False], ids=['on_conflict', 'plain_insert'])
+def test_import_skips_stored_numbers(db, monkeypatch, on_conflict):
+    if not on_conflict:
+        # What dialects without ON CONFLICT get
+        monkeypatch.setattr(csv_importer, 'insert_new_contacts', lambda session, model: None)
+
+    assert run_import(db, CSV) == {
+        'total_rows': 6, 'imported': 3, 'skipped': 1, 'duplicates': 2, 'invalid_phones': 0
+    }
+    assert run_import(db, CSV + '+442079460958,g,\n')['imported'] == 1
+    assert stored(db) == [
+        ('+14155552671', 'a'), ('+442079460958', 'g'), ('+919876543210', 'c'), ('12', 'f')
+    ]
+
+
+def test_missing_phone_column(db):
+    with pytest.raises(Exception, match='Phone column not found in CSV'):
+        run_import(db, CSV, {'phone': 'Mobile'})
+
+
+@pytest.fixture(params=['pandas', 'pyarrow'])
+def reader(request, monkeypatch):
+    """Run a test under both CSV readers; the pyarrow one only where it is installed."""
+    if request.param == 'pyarrow':
+        pytest.importorskip('pyarrow')
+        # Small blocks so ragged rows land in several batches
+        monkeypatch.setattr(csv_importer, 'ARROW_BLOCK_SIZE', 64)
+    else:
+        monkeypatch.setattr(csv_importer, 'pa', None)
+    return request.param
+
+
+def test_ragged_rows_are_fitted_to_the_header(db, reader):
+    data = (
+        'Phone,Name,Notes\n'
+        '+14155552671,a,x\n'
+        '9876543210,c\n'
+        '+442079460958\n'
+        '+61 2 9374 4000,d,x,extra\n'
+        + ''.join(f'+9198765432{i:02d},n{i},x\n' for i in range(10))
+    )
+
+    assert run_import(db, data) == {
+        'total_rows': 14, 'imported': 14, 'skipped': 0, 'duplicates': 0, 'invalid_phones': 0
+    }
+    contacts = dict(stored(db))
+    assert contacts['+919876543210'] == 'c'
+    assert contacts['+442079460958'] == ''
+    assert contacts['+61293744000'] == 'd'
+
+
+def test_missing_phone_column_under_both_readers(db, reader):
+    with pytest.raises(Exception, match='Phone column not found in CSV'):
+        run_import(db, CSV, {'phone': 'Mobile', 'name': 'Name'})
+
+
+def test_header_only_csv(db, reader):
+    with pytest.raises(Exception, match='Phone column not found in CSV'):
+        run_import(db, 'Mobile,Name\n')
+    assert run_import(db, 'Phone,Name\n')['total_rows'] == 0
+
+
+def test_duplicate_header_names_use_the_first_column(db, reader):
+    data = 'Phone,Name,Phone,Name\n+14155552671,a,9876543210,b\n+442079460958,c,,\n'
+
+    assert run_import(db, data)['imported'] == 2
+    assert stored(db) == [('+14155552671', 'a'), ('+442079460958', 'c')]
+    assert run_import(db, data, {'phone': 'Phone.1', 'name': 'Name.1'})['imported'] == 1
+    assert ('+919876543210', 'b') in stored(db)
@@ -0,0 +1,54 @@
+from sqlalchemy import create_engine, inspect
+
+import database
+import models  # noqa: F401  registers the tables on Base.metadata
+
+
+def index_names(engine, table):
+    return {index['name'] for index in inspect(engine).get_indexes(table)}
+
+
+def test_sync_indexes_updates_existing_tables(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    monkeypatch.setattr(database, 'engine', engine)
+    database.Base.metadata.create_all(bind=engine)
+
+    # A table from an older version, missing a model index
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_screenshots_upload_date")
+
+    database.sync_indexes()
+    database.sync_indexes()
+
+    assert 'ix_screenshots_upload_date' in index_names(engine, 'screenshots')
+
+
+def test_has_pg_trgm_checks_for_the_extension(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/trgm.db")
+    with engine.connect() as conn:
+        conn.exec_driver_sql("CREATE TABLE pg_extension (extname TEXT)")
+        assert not models.has_pg_trgm(None, None, conn)
+        conn.exec_driver_sql("INSERT INTO pg_extension VALUES ('pg_trgm')")
+        assert models.has_pg_trgm(None, None, conn)
+
+
+def test_sync_indexes_reports_duplicates_instead_of_a_unique_index(tmp_path, monkeypatch, caplog):
+    engine = create_engine(f"sqlite:///{tmp_path}/dups.db")
+    monkeypatch.setattr(database, 'engine', engine)
+    database.Base.metadata.create_all(bind=engine)
+
+    # Duplicate names from before Group.name was unique
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_groups_name")
+        conn.exec_driver_sql(
+            "INSERT INTO groups (id, name) VALUES ('1', 'Leads'), ('2', 'Leads'), ('3', 'VIP')"
+        )
+
+    database.sync_indexes()
+    assert 'ix_groups_name' not in index_names(engine, 'groups')
+    assert "ix_groups_name" in caplog.text and "Leads" in caplog.text
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM groups WHERE id = '2'")
+    database.sync_indexes()
+    assert 'ix_groups_name' in index_names(engine, 'groups')
@@ -0,0 +1,37 @@
+import pytest
+
+from models import ExtractedNumber
+from routers.numbers import list_numbers
+
+
+@pytest.fixture(autouse=True)
+def numbers(db):
+    db.add_all([
+        ExtractedNumber(raw_number='+1 415 555 2671', normalized_number='+14155552671', is_valid=True),
+        ExtractedNumber(raw_number='+91 98765 43210', normalized_number='+919876543210', is_valid=True),
+        # Invalid: no normalized form, only the raw OCR text
+        ExtractedNumber(raw_number='+1 415 000', normalized_number=None, is_valid=False),
+    ])
+    db.commit()
+
+
+def search(db, term):
+    result = list_numbers(
+        page=1, limit=50, country_code=None, is_valid=None, screenshot_id=None,
+        search=term, include_total=False, cursor=None, db=db
+    )
+    return sorted(item['raw_number'] for item in result['items'])
+
+
+def test_plus_search_matches_e164_prefix_and_raw_text(db):
+    # '+1 415' prefixes the valid number's E.164 form and the invalid one's raw text
+    assert search(db, '+1 415') == ['+1 415 000', '+1 415 555 2671']
+
+
+def test_plus_search_is_anchored_at_the_country_code(db):
+    assert search(db, '+91') == ['+91 98765 43210']
+    assert search(db, '+415') == []
+
+
+def test_local_fragment_matches_anywhere(db):
+    assert search(db, '98765') == ['+91 98765 43210']
@@ -0,0 +1,158 @@
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from services import ocr_service
+from services.phone_parser import WHATSAPP_RE
+
+
+class FakeTessAPI:
+    """
+    Mimics how Tesseract caches recognition: results stay until SetImage,
+    SetRectangle or Clear, whatever the page segmentation mode is now.
+    """
+
+    TEXT = {11: 'hello there', 6: 'call +1 415 555 2671'}
+    LOW_CONFIDENCE = set()  # Words the fake reads below OCR_MIN_CONFIDENCE
+
+    def __init__(self):
+        self.psm = None
+        self.recognized_psm = None
+        self.ended = False
+
+    def SetPageSegMode(self, psm):
+        self.psm = psm
+
+    def SetImage(self, image):
+        self.recognized_psm = None
+
+    def SetRectangle(self, left, top, width, height):
+        self.recognized_psm = None
+
+    def Clear(self):
+        self.recognized_psm = None
+
+    def End(self):
+        self.ended = True
+
+    def Recognize(self):
+        if self.recognized_psm is None:
+            self.recognized_psm = self.psm
+
+    def GetUTF8Text(self):
+        self.Recognize()
+        return self.TEXT[self.recognized_psm]
+
+    def GetIterator(self):
+        self.Recognize()
+        return FakeWordIterator(self.TEXT[self.recognized_psm].split(), self.LOW_CONFIDENCE)
+
+
+class FakeWordIterator:
+    def __init__(self, words, low_confidence=()):
+        self.words = words
+        self.low_confidence = low_confidence
+        self.index = 0
+
+    def IsAtBeginningOf(self, level):
+        return self.index == 0
+
+    def GetUTF8Text(self, level):
+        return self.words[self.index]
+
+    def Confidence(self, level):
+        return 10.0 if self.words[self.index] in self.low_confidence else 90.0
+
+
+def iterate_words(iterator, level):
+    for iterator.index in range(len(iterator.words)):
+        yield iterator
+
+
+class PSM:
+    SPARSE_TEXT = 11
+    SINGLE_BLOCK = 6
+
+
+class RIL:
+    BLOCK, PARA, TEXTLINE, WORD = range(4)
+
+
+@pytest.fixture
+def tess_api(monkeypatch):
+    api = FakeTessAPI()
+    monkeypatch.setattr(ocr_service, '_tess_idle', [api])
+    monkeypatch.setattr(ocr_service, 'PSM', PSM, raising=False)
+    monkeypatch.setattr(ocr_service, 'RIL', RIL, raising=False)
+    monkeypatch.setattr(ocr_service, 'iterate_level', iterate_words, raising=False)
+    return api
+
+
+def test_tesserocr_fallback_runs_a_second_pass(tess_api):
+    text = ocr_service.ocr_with_tesserocr(Image.new('L', (40, 20)), WHATSAPP_RE)
+
+    sparse, fallback = text.split('\n')
+    assert sparse == 'hello there'
+    assert fallback == 'call +1 415 555 2671'
+
+
+def test_tesserocr_skips_fallback_when_sparse_pass_finds_a_number(tess_api):
+    tess_api.TEXT = {11: '+1 415 555 2671', 6: 'unused'}
+
+    assert ocr_service.ocr_with_tesserocr(Image.new('L', (40, 20)), WHATSAPP_RE) == '+1 415 555 2671'
+
+
+def test_tesserocr_falls_back_when_sparse_pass_drops_words(tess_api):
+    # Three numbers on screen; the sparse pass misreads the third one's digits
+    tess_api.TEXT = {
+        11: '+1 415 555 2671 +1 212 555 0147 +1 3l0 55S 0199',
+        6: '+1 415 555 2671\n+1 212 555 0147\n+1 310 555 0199',
+    }
+    tess_api.LOW_CONFIDENCE = {'3l0', '55S', '0199'}
+
+    sparse, *fallback = ocr_service.ocr_with_tesserocr(Image.new('L', (40, 20)), WHATSAPP_RE).split('\n')
+    assert '3l0' not in sparse
+    assert '+1 310 555 0199' in fallback
+
+
+def test_tesserocr_apis_are_capped_and_reused(monkeypatch):
+    created = []
+
+    def make_api(oem):
+        created.append(FakeTessAPI())
+        return created[-1]
+
+    monkeypatch.setattr(ocr_service, 'PyTessBaseAPI', make_api, raising=False)
+    monkeypatch.setattr(ocr_service, 'OEM', type('OEM', (), {'DEFAULT': 3}), raising=False)
+    monkeypatch.setattr(ocr_service, '_tess_idle', [])
+    monkeypatch.setattr(ocr_service, '_tess_slots', threading.BoundedSemaphore(2))
+
+    release = threading.Event()
+    in_use = []
+
+    def hold_api():
+        with ocr_service.tesserocr_api() as api:
+            in_use.append(api)
+            release.wait(5)
+
+    threads = [threading.Thread(target=hold_api) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while len(in_use) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # The third call waits for a free API instead of loading another model
+    time.sleep(0.1)
+    assert len(in_use) == 2
+
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(in_use) == 3
+    assert len(created) == 2
+
+    ocr_service.close_tesserocr_apis()
+    assert all(api.ended for api in created)
+    assert ocr_service._tess_idle == []
@@ -0,0 +1,51 @@
+import random
+
+import phonenumbers
+import pytest
+
+from services.phone_parser import E164_RE, _is_plain_e164, extract_phones_from_text, normalize_for_comparison
+
+
+def parsed_e164(number: str) -> str:
+    return phonenumbers.format_number(phonenumbers.parse(number, None), phonenumbers.PhoneNumberFormat.E164)
+
+
+def e164_probes():
+    """Example numbers for every region and type, plus random digits after every calling code."""
+    probes = set()
+    for region in phonenumbers.SUPPORTED_REGIONS:
+        for number_type in range(12):
+            example = phonenumbers.example_number_for_type(region, number_type)
+            if example:
+                probes.add(phonenumbers.format_number(example, phonenumbers.PhoneNumberFormat.E164))
+
+    rng = random.Random(0)
+    for country_code in phonenumbers.COUNTRY_CODE_TO_REGION_CODE:
+        for _ in range(20):
+            national = ''.join(rng.choice('0123456789') for _ in range(rng.randint(9, 12)))
+            probes.add(f'+{country_code}{national}')
+    return sorted(p for p in probes if E164_RE.fullmatch(p))
+
+
+@pytest.mark.parametrize('number', ['+112015550123', '+78123456789', '+4402079460958'])
+def test_trunk_prefix_takes_the_parse_path(number):
+    assert not _is_plain_e164(number)
+    assert normalize_for_comparison(number) == parsed_e164(number)
+
+
+def test_fast_path_matches_libphonenumber():
+    fast = [number for number in e164_probes() if _is_plain_e164(number)]
+    assert fast
+    mismatches = [number for number in fast if parsed_e164(number) != number]
+    assert mismatches == []
+
+
+@pytest.mark.parametrize('text, number', [
+    ('811 6700832045', '+916700832045'),
+    ('221\n9313376245', '+19313376245'),
+    ('6552\n9271925598', '+919271925598'),
+    ('Cell +1 (415) 555-2671 12:45', '+14155552671'),
+])
+def test_digit_fragment_before_a_number_does_not_hide_it(text, number):
+    for source in ('whatsapp', 'sms'):
+        assert number in [r['normalized'] for r in extract_phones_from_text(text, source)]